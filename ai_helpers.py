@@ -1,74 +1,307 @@
 import os
 import json
-import requests
-import PyPDF2
-import docx
+import logging
+import hashlib
+import threading
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
 from dotenv import load_dotenv
 
+import metrics
+from cache import ResultCache, make_key
+from coalesce import Coalescer
+from structured_output import generate_json
+from prompt_builder import estimate_tokens, pack_jd, pack_resume
+from gemini_client import GeminiClient
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 API_KEY = os.getenv("GEMINI_API_KEY")
-URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent"
+URL = os.getenv("GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent")
+
+# Token budgets for the resume / JD text inside a prompt (about 4 characters per token);
+# over-budget text keeps its highest-value sections, see prompt_builder
+RESUME_PROMPT_TOKENS = int(os.getenv("RESUME_PROMPT_TOKENS", "1000"))
+JD_PROMPT_TOKENS = int(os.getenv("JD_PROMPT_TOKENS", "750"))
+
+# Cache of parsed analysis results, keyed by prompt type + the exact text sent to Gemini.
+# Set AI_CACHE_DB to a file path to keep results across restarts and share them between workers.
+AI_CACHE = ResultCache(
+    max_entries=int(os.getenv("AI_CACHE_SIZE", "256")),
+    ttl=int(os.getenv("AI_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("AI_CACHE_DB") or None,
+    disk_max_entries=int(os.getenv("AI_CACHE_DISK_SIZE", "10000"))
+)
+
+# Extracted text keyed by the SHA-256 of the uploaded bytes, so re-uploads skip PDF/DOCX parsing.
+# Memory is bounded by total characters held; TEXT_CACHE_DB adds a shared on-disk tier.
+TEXT_CACHE = ResultCache(
+    max_entries=int(os.getenv("TEXT_CACHE_SIZE", "512")),
+    max_bytes=int(os.getenv("TEXT_CACHE_MAX_CHARS", str(32 * 1024 * 1024))),
+    sizeof=len,
+    ttl=int(os.getenv("TEXT_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("TEXT_CACHE_DB") or None,
+    disk_max_entries=int(os.getenv("TEXT_CACHE_DISK_SIZE", "5000"))
+)
+
+# technical_skills keys the AI analysis always returns, and the taxonomy category
+# that maps to soft_skills in hybrid mode
+AI_SKILL_CATEGORIES = ["Languages", "Frameworks_and_Libraries", "Tools_and_Platforms", "Databases_and_Cloud"]
+SOFT_SKILL_CATEGORY = "Soft_Skills"
+
+# Bump when the /analyze_ats prompts or schemas change so stored analyses from the old prompt aren't reused
+ATS_PROMPT_VERSION = "1"
+
+# Response schemas, sent as Gemini's responseSchema in JSON mode and used to validate replies
+_STRINGS = {"type": "ARRAY", "items": {"type": "STRING"}}
+_JOB_ROLES = {"type": "ARRAY", "items": {"type": "OBJECT", "properties": {
+    "title": {"type": "STRING"}, "description": {"type": "STRING"}}, "required": ["title", "description"]}}
+_MISSING_SKILLS = {"type": "ARRAY", "items": {"type": "OBJECT", "properties": {
+    "skill": {"type": "STRING"}, "recommendation": {"type": "STRING"}}, "required": ["skill", "recommendation"]}}
+_TECHNICAL_SKILLS = {"type": "OBJECT", "properties": {category: _STRINGS for category in AI_SKILL_CATEGORIES},
+                     "required": AI_SKILL_CATEGORIES}
+
+ATS_SCHEMA = {"type": "OBJECT", "properties": {
+    "technical_skills": _TECHNICAL_SKILLS,
+    "soft_skills": _STRINGS,
+    "job_roles": _JOB_ROLES,
+    "ats_tips": _STRINGS,
+    "missing_skills": _MISSING_SKILLS
+}, "required": ["technical_skills", "soft_skills", "job_roles", "ats_tips", "missing_skills"]}
+ANALYSIS_SCHEMA = {"type": "OBJECT", "properties": dict(ATS_SCHEMA["properties"], ats_score={"type": "INTEGER"}),
+                   "required": ATS_SCHEMA["required"] + ["ats_score"]}
+HYBRID_SCHEMA = {"type": "OBJECT", "properties": {
+    "job_roles": _JOB_ROLES,
+    "ats_tips": _STRINGS,
+    "missing_skills": _MISSING_SKILLS
+}, "required": ["job_roles", "ats_tips", "missing_skills"]}
+SENTENCES_SCHEMA = _STRINGS
+
+# Ask Gemini for schema-constrained JSON (responseMimeType/responseSchema); set to 0 for models without it
+AI_JSON_MODE = os.getenv("AI_JSON_MODE", "1") == "1"
+
+# Improved resume sentences, keyed by the original sentence
+SENTENCE_CACHE = ResultCache(
+    max_entries=int(os.getenv("SENTENCE_CACHE_SIZE", "2048")),
+    ttl=int(os.getenv("SENTENCE_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("SENTENCE_CACHE_DB") or None,
+    disk_max_entries=int(os.getenv("SENTENCE_CACHE_DISK_SIZE", "20000"))
+)
 
-import time
+# Most sentences packed into one Gemini prompt, and how long single /improve_sentence
+# calls wait for company before going upstream together
+SENTENCE_BATCH_MAX = int(os.getenv("SENTENCE_BATCH_MAX", "20"))
+SENTENCE_COALESCE_MS = int(os.getenv("SENTENCE_COALESCE_MS", "25"))
+
+# Shared client: pooled keep-alive connections, capped concurrency, jittered retries
+gemini = GeminiClient(
+    API_KEY, URL,
+    timeout=int(os.getenv("GEMINI_TIMEOUT", "120")),
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+)
 
 def call_gemini(text):
-    if not API_KEY: return "Error: No API Key found in .env"
-    headers = {'Content-Type': 'application/json'}
-    data = {"contents": [{"parts": [{"text": text}]}]}
-    # Simple Retry Logic with Backoff for 503s
-    for attempt in range(3):
-        try:
-            resp = requests.post(f"{URL}?key={API_KEY}", headers=headers, json=data, timeout=120)
-            
-            if resp.status_code == 503:
-                if attempt < 2:
-                    time.sleep(3) # Wait 3 seconds and retry on high demand
-                    continue
-                return f"Error {resp.status_code}: {resp.text}"
-                
-            if resp.status_code != 200:
-                return f"Error {resp.status_code}: {resp.text}"
-                
-            res_json = resp.json()
-            if 'candidates' not in res_json or not res_json['candidates']:
-                return "Error: No response candidates (Possible Safety Block)."
-                
-            return res_json['candidates'][0]['content']['parts'][0]['text']
-        except Exception as e:
-            if attempt == 2: # Last attempt
-                return f"Error connecting to AI: {str(e)}"
-            time.sleep(2)
+    """Kept for existing callers; delegates to the shared GeminiClient."""
+    return gemini.generate(text)
+
+# Largest uncompressed DOCX XML we are willing to parse into memory
+DOCX_MAX_XML_BYTES = int(os.getenv("DOCX_MAX_XML_BYTES", str(64 * 1024 * 1024)))
 
 # Extractors
-def extract_text_from_pdf(file_path):
-    text = ""
+# Each accepts a path, a binary file-like object (e.g. the upload stream) or raw bytes,
+# so uploads can be parsed straight from memory without a temp file.
+def _as_stream(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BytesIO(source)
+    return source
+
+def _read_all(source):
+    """Return the full contents of a path or binary file-like object as bytes."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    source.seek(0)
+    return source.read()
+
+def _join_capped(chunks, max_chars=None):
+    """Join text chunks in one pass, stopping as soon as max_chars have been collected."""
+    parts, total = [], 0
+    for chunk in chunks:
+        parts.append(chunk)
+        total += len(chunk)
+        if max_chars is not None and total >= max_chars:
+            break
+    text = "".join(parts)
+    return text[:max_chars] if max_chars is not None else text
+
+# PDFs with at least this many pages are split into page ranges across a process pool;
+# smaller ones stay on the serial path where pool overhead would dominate.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+PDF_PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn, not fork: the web worker is multi-threaded by the time this is created
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_PARALLEL_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+def _reset_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+def _extract_pdf_range(data, start, stop):
+    """Worker: extract pages [start, stop) of a PDF given as bytes."""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(BytesIO(data))
+    return "".join((reader.pages[i].extract_text() or "") + "\n" for i in range(start, stop))
+
+def _parallel_pdf_chunks(data, page_count, workers):
+    """Yield page-range texts in order, keeping at most 2 ranges per worker in flight.
+
+    Ranges are submitted lazily, so stopping early (max_chars reached) cancels the rest.
+    """
+    pool = _get_pdf_pool()
+    chunk = max(2, -(-page_count // (workers * 4)))
+    ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+    pending = []
     try:
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+        for start, stop in ranges:
+            pending.append(pool.submit(_extract_pdf_range, data, start, stop))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        while pending:
+            yield pending.pop(0).result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def extract_text_from_pdf(source, max_chars=None, max_pages=None, parallel=None):
+    """Extract PDF text page by page; parsing stops once max_chars or max_pages is reached.
+
+    parallel=None picks the process-pool path automatically for PDFs with at least
+    PDF_PARALLEL_MIN_PAGES pages; True/False force one path or the other.
+    """
+    def pages(reader, page_count):
+        for i in range(page_count):
+            yield (reader.pages[i].extract_text() or "") + "\n"
+
+    # Imported on first use to keep app import (and every worker boot) light
+    import PyPDF2
+
+    try:
+        stream = _as_stream(source)
+        reader = PyPDF2.PdfReader(stream)
+        page_count = len(reader.pages)
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+
+        if parallel is None:
+            parallel = page_count >= PDF_PARALLEL_MIN_PAGES and PDF_PARALLEL_WORKERS > 1
+        if parallel:
+            data = source if isinstance(source, bytes) else _read_all(stream)
+            try:
+                return _join_capped(_parallel_pdf_chunks(data, page_count, PDF_PARALLEL_WORKERS), max_chars)
+            except BrokenProcessPool as e:
+                # A worker died (e.g. OOM-killed): drop the pool and finish on the serial path
+                print(f"PDF process pool failed, extracting serially: {e}")
+                _reset_pdf_pool()
+        return _join_capped(pages(reader, page_count), max_chars)
     except Exception as e:
         print(f"Error reading PDF: {e}")
-    return text
+    return ""
+
+def _docx_xml_size(stream):
+    """Total uncompressed size of the XML parts in a DOCX (zip) stream."""
+    with zipfile.ZipFile(stream) as archive:
+        return sum(info.file_size for info in archive.infolist() if info.filename.endswith(".xml"))
+
+def extract_text_from_docx(source, max_chars=None):
+    """Extract DOCX paragraph text, stopping once max_chars have been collected.
+
+    python-docx loads the whole document XML, so files whose XML would inflate past
+    DOCX_MAX_XML_BYTES (e.g. a small, highly compressed upload) are refused unread.
+    """
+    import docx
 
-def extract_text_from_docx(file_path):
-    text = ""
     try:
-        doc = docx.Document(file_path)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
+        stream = _as_stream(source)
+        xml_size = _docx_xml_size(stream)
+        if hasattr(stream, "seek"):
+            stream.seek(0)
+        if xml_size > DOCX_MAX_XML_BYTES:
+            print(f"Error reading DOCX: {xml_size} bytes of XML exceeds DOCX_MAX_XML_BYTES")
+            return ""
+        doc = docx.Document(stream)
+        return _join_capped((para.text + "\n" for para in doc.paragraphs), max_chars)
     except Exception as e:
         print(f"Error reading DOCX: {e}")
+    return ""
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def extract_text(file_type, data, max_chars=None):
+    """Extract text from uploaded bytes ('pdf' or 'docx'), served from TEXT_CACHE when seen before."""
+    cache_key = make_key("text", file_digest(data), file_type, max_chars)
+    cached = TEXT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    text = ""
+    with metrics.timed("extract"):
+        if file_type == 'pdf':
+            text = extract_text_from_pdf(data, max_chars=max_chars)
+        elif file_type == 'docx':
+            text = extract_text_from_docx(data, max_chars=max_chars)
+
+    # Empty results usually mean a parse error; don't pin those
+    if text.strip():
+        TEXT_CACHE.set(cache_key, text)
     return text
 
 # AI Functions
+def _parsed_and_cached(cache_key, prompt, schema):
+    """Run a JSON prompt; cache the result only when every field came back valid."""
+    result, missing, res = generate_json(gemini, prompt, schema, json_mode=AI_JSON_MODE)
+    if result is None:
+        return {"error": f"Failed to parse AI response: {res}"}
+    # Incomplete (default-filled) results aren't cached so the next call tries again
+    if not missing:
+        AI_CACHE.set(cache_key, result)
+    return result
+
+def _log_prompt(kind, prompt):
+    tokens = estimate_tokens(prompt)
+    metrics.PROMPT_TOKENS.observe(tokens, kind)
+    logger.info("Gemini %s prompt: ~%d tokens", kind, tokens)
+
 def analyze_with_ai(text):
+    resume = pack_resume(text, RESUME_PROMPT_TOKENS)
+    cache_key = make_key("analyze", resume)
+    cached = AI_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     prompt = f"""
     You are an expert ATS (Applicant Tracking System) scanner and career coach. Analyze the resume text below.
     Resume Text:
-    {text[:4000]}
+    {resume}
     Tasks:
     1. Extract specific Technical Skills (programming, tools, hard skills).
     2. Extract specific Soft Skills (communication, leadership, etc.).
@@ -90,23 +323,29 @@ def analyze_with_ai(text):
         "missing_skills": [{{"skill": "", "recommendation": ""}}]
     }}
     """
-    res = call_gemini(prompt)
-    try:
-        if "```json" in res: res = res.split("```json")[1].split("```")[0]
-        elif "```" in res: res = res.split("```")[1].split("```")[0]
-        return json.loads(res.strip())
-    except:
-        return {"error": f"Failed to parse AI response: {res}"}
+    _log_prompt("analyze", prompt)
+    return _parsed_and_cached(cache_key, prompt, ANALYSIS_SCHEMA)
+
+def analyze_with_ai_ats(text, jd_text, local=None):
+    """Resume-vs-JD AI analysis. With `local` findings from the ATS scan, runs in hybrid mode."""
+    if local is not None:
+        return _analyze_ats_hybrid(text, jd_text, local)
+
+    resume = pack_resume(text, RESUME_PROMPT_TOKENS)
+    jd = pack_jd(jd_text, JD_PROMPT_TOKENS)
+    cache_key = make_key("analyze_ats", resume, jd)
+    cached = AI_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
-def analyze_with_ai_ats(text, jd_text):
     prompt = f"""
     You are an expert ATS (Applicant Tracking System) scanner and career coach. Analyze the resume against the job description below.
     
     Job Description:
-    {jd_text[:3000] if jd_text else 'N/A (Provide general analysis)'}
+    {jd or 'N/A (Provide general analysis)'}
     
     Resume Text:
-    {text[:4000]}
+    {resume}
     
     Tasks:
     1. Extract specific Technical Skills (programming, tools, hard skills) found in the Resume.
@@ -129,22 +368,135 @@ def analyze_with_ai_ats(text, jd_text):
         "missing_skills": [{{"skill": "", "recommendation": ""}}]
     }}
     """
-    res = call_gemini(prompt)
-    try:
-        if "```json" in res: res = res.split("```json")[1].split("```")[0]
-        elif "```" in res: res = res.split("```")[1].split("```")[0]
-        return json.loads(res.strip())
-    except:
+    _log_prompt("analyze_ats", prompt)
+    return _parsed_and_cached(cache_key, prompt, ATS_SCHEMA)
+
+def _analyze_ats_hybrid(text, jd_text, local):
+    """Ask Gemini only for roles, tips and missing-skill advice; fill the skill fields from `local`.
+
+    local is {"skills": {category: [names]}, "missing_keywords": [...], "missing_sections": [...]}.
+    The result has the same shape as the full analysis.
+    """
+    resume = pack_resume(text, RESUME_PROMPT_TOKENS)
+    jd = pack_jd(jd_text, JD_PROMPT_TOKENS)
+    skills = local.get("skills") or {}
+    found = [name for names in skills.values() for name in names]
+    missing = list(local.get("missing_keywords") or [])[:30]
+    missing_sections = list(local.get("missing_sections") or [])
+    cache_key = make_key("analyze_ats_hybrid", resume, jd, json.dumps([found, missing, missing_sections]))
+    cached = AI_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    prompt = f"""
+    You are an expert ATS (Applicant Tracking System) scanner and career coach. Review the resume against the job description below.
+
+    Job Description:
+    {jd or 'N/A (Provide general analysis)'}
+
+    Resume Text:
+    {resume}
+
+    Already found by our scanner (do not repeat these as output):
+    Skills in the resume: {", ".join(found) or "none detected"}
+    Job description keywords missing from the resume: {", ".join(missing) or "none"}
+    Missing resume sections: {", ".join(missing_sections) or "none"}
+
+    Tasks:
+    1. Suggest 3 suitable job roles containing a title and description.
+    2. Provide 6 specific tips to improve the resume, particularly referencing the Job Description if provided.
+    3. Identify 3 critical MISSING skills (prefer the missing keywords above) and provide a brief recommendation on how to learn/showcase them.
+
+    Return ONLY a JSON object with this exact structure:
+    {{
+        "job_roles": [{{"title": "", "description": ""}}],
+        "ats_tips": [],
+        "missing_skills": [{{"skill": "", "recommendation": ""}}]
+    }}
+    """
+    _log_prompt("analyze_ats_hybrid", prompt)
+    parsed, missing, res = generate_json(gemini, prompt, HYBRID_SCHEMA, json_mode=AI_JSON_MODE)
+    if parsed is None:
         return {"error": f"Failed to parse AI response: {res}"}
 
+    technical = {category: [] for category in AI_SKILL_CATEGORIES}
+    for category, names in skills.items():
+        if category != SOFT_SKILL_CATEGORY:
+            technical.setdefault(category, []).extend(names)
+    result = {
+        "technical_skills": technical,
+        "soft_skills": list(skills.get(SOFT_SKILL_CATEGORY, [])),
+        "job_roles": parsed["job_roles"],
+        "ats_tips": parsed["ats_tips"],
+        "missing_skills": parsed["missing_skills"]
+    }
+    if not missing:
+        AI_CACHE.set(cache_key, result)
+    return result
+
 def generate_summary_ai(role, skills):
     prompt = f"Write a concise, professional resume summary (3-4 sentences) for a {role} with skills: {skills}."
-    return call_gemini(prompt)
+    _log_prompt("summary", prompt)
+    return gemini.generate(prompt)
 
-def improve_sentence_ai(sentence):
+def _improve_one(sentence):
     prompt = f"""
     You are an expert resume writer. Rewrite the following sentence to sound much more professional, impactful, and action-oriented for a resume experience section.
     Original: "{sentence}"
     Return ONLY the improved sentence, nothing else. Avoid quotes.
     """
-    return call_gemini(prompt)
+    _log_prompt("improve_sentence", prompt)
+    return gemini.generate(prompt)
+
+def _improve_batch(sentences):
+    """Rewrite several sentences with one structured prompt; falls back to one call each on a malformed reply."""
+    if len(sentences) == 1:
+        return [_improve_one(sentences[0])]
+
+    prompt = f"""
+    You are an expert resume writer. Rewrite each of the following sentences to sound much more professional, impactful, and action-oriented for a resume experience section.
+    Sentences (JSON array):
+    {json.dumps(sentences)}
+    Return ONLY a JSON array of exactly {len(sentences)} strings: the improved sentences, in the same order. Avoid quotes inside the sentences.
+    """
+    _log_prompt("improve_sentences", prompt)
+    improved, _, res = generate_json(gemini, prompt, SENTENCES_SCHEMA, json_mode=AI_JSON_MODE)
+    if res.startswith("Error"):
+        return [res] * len(sentences)
+    if improved is None or len(improved) != len(sentences) or not all(isinstance(s, str) for s in improved):
+        return [_improve_one(s) for s in sentences]
+    return [s.strip() for s in improved]
+
+def improve_sentences_ai(sentences):
+    """Improve a list of sentences, in order, using as few Gemini calls as possible.
+
+    Cached sentences are answered from SENTENCE_CACHE; the rest are de-duplicated and sent
+    in chunks of SENTENCE_BATCH_MAX. Failures come back as "Error ..." strings and are not cached.
+    """
+    keys = [make_key("improve_sentence", s.strip()) for s in sentences]
+    results = [SENTENCE_CACHE.get(key) for key in keys]
+
+    pending = {}
+    for sentence, key, result in zip(sentences, keys, results):
+        if result is None and key not in pending:
+            pending[key] = sentence.strip()
+
+    todo = list(pending.items())
+    improved = {}
+    for start in range(0, len(todo), SENTENCE_BATCH_MAX):
+        chunk = todo[start:start + SENTENCE_BATCH_MAX]
+        for (key, _), text in zip(chunk, _improve_batch([s for _, s in chunk])):
+            improved[key] = text
+            if not text.startswith("Error"):
+                SENTENCE_CACHE.set(key, text)
+
+    return [result if result is not None else improved[key] for key, result in zip(keys, results)]
+
+# Concurrent single-sentence requests within the window share one upstream call
+sentence_coalescer = Coalescer(improve_sentences_ai, window=SENTENCE_COALESCE_MS / 1000, max_batch=SENTENCE_BATCH_MAX)
+
+def improve_sentence_ai(sentence):
+    cached = SENTENCE_CACHE.get(make_key("improve_sentence", sentence.strip()))
+    if cached is not None:
+        return cached
+    return sentence_coalescer.submit(sentence)
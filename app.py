@@ -1,22 +1,26 @@
 import os
+import gc
 import json
-import requests
 import logging
 import tempfile
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file
+import threading
+import time
+from datetime import datetime, timezone
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-import PyPDF2
-import docx
 from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 
-from ai_helpers import extract_text_from_pdf, extract_text_from_docx, analyze_with_ai, analyze_with_ai_ats, improve_sentence_ai
-from ats_engine import ATSScanner
+from cache import make_key
+from ai_helpers import file_digest, extract_text, analyze_with_ai, analyze_with_ai_ats, improve_sentence_ai, improve_sentences_ai, gemini, AI_CACHE, TEXT_CACHE, SENTENCE_CACHE, ATS_PROMPT_VERSION, RESUME_PROMPT_TOKENS, JD_PROMPT_TOKENS
+from ats_engine import ATSScanner, ResourceBudget, ANALYSIS_CACHE, SCORE_WEIGHTS, get_nlp, get_skill_matcher
+from jobs import JobQueue
+from jd_index import JDIndex
+from report import REPORT_CACHE, get_report_pdf, report_key
+import metrics
+import structured_output
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
@@ -47,23 +51,338 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(150), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
 
+class Analysis(db.Model):
+    """A stored /analyze_ats result, reusable when the same resume + JD come in again."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    file_digest = db.Column(db.String(64), nullable=False)
+    jd_hash = db.Column(db.String(64), nullable=False)
+    total_score = db.Column(db.Integer, nullable=True)
+    score = db.Column(db.JSON, nullable=True)
+    info = db.Column(db.JSON, nullable=True)
+    sections = db.Column(db.JSON, nullable=True)
+    keywords = db.Column(db.JSON, nullable=True)
+    ai_analysis = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('ix_analysis_user_created', 'user_id', 'created_at'),
+        db.Index('ix_analysis_digest_jd', 'file_digest', 'jd_hash'),
+    )
+
+    def summary(self):
+        return {
+            "analysis_id": self.id,
+            "filename": self.filename,
+            "total_score": self.total_score,
+            "created_at": self.created_at.isoformat()
+        }
+
+    def result(self):
+        """The stored analysis in the same shape /analyze_ats returns."""
+        return {
+            "analysis_id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "info": self.info,
+            "sections": self.sections,
+            "keywords": self.keywords,
+            "score": self.score,
+            "ai_analysis": self.ai_analysis
+        }
+
+class JobDescription(db.Model):
+    """A stored job description plus the terms it is indexed on, so workers rebuild the index without re-parsing."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    title = db.Column(db.String(255), nullable=True)
+    text = db.Column(db.Text, nullable=False)
+    source = db.Column(db.String(16), nullable=False)
+    terms = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def summary(self):
+        return {"jd_id": self.id, "title": self.title, "created_at": self.created_at.isoformat()}
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-# Create tables
-with app.app_context():
-    db.create_all()
+# Create tables on first request (or in warmup) instead of at import time
+_db_ready = False
+_db_lock = threading.Lock()
+
+def init_db():
+    global _db_ready
+    if _db_ready:
+        return
+    with _db_lock:
+        if not _db_ready:
+            with app.app_context():
+                db.create_all()
+            _db_ready = True
+
+@app.before_request
+def ensure_db():
+    init_db()
+
+@app.before_request
+def start_timing():
+    metrics.start_request_timing()
+    request.start_time = time.perf_counter()
+
+@app.after_request
+def record_timing(response):
+    start = getattr(request, 'start_time', None)
+    if start is not None:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, request.endpoint or 'unknown')
+    if app.config['SERVER_TIMING']:
+        stages = metrics.request_timings()
+        if stages:
+            response.headers['Server-Timing'] = ", ".join(
+                f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages.items())
+    return response
+
+def warmup():
+    """Load everything heavy up front; called from gunicorn's master when preloading.
+
+    Workers forked afterwards share the loaded model copy-on-write instead of each
+    loading its own on the first scan.
+    """
+    init_db()
+    # Connections opened in the master must not be shared by forked workers
+    with app.app_context():
+        db.engine.dispose()
+    get_nlp()
+    get_skill_matcher()
+    import PyPDF2, docx, reportlab.platypus  # noqa: F401
+    # Keep the cyclic GC from touching (and so copying) the preloaded objects in every worker
+    gc.freeze()
 
-# Use system temp directory for uploads
-app.config['UPLOAD_FOLDER'] = tempfile.gettempdir() 
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB limit
+# Per-stage timings in a Server-Timing response header (visible in browser devtools)
+app.config['SERVER_TIMING'] = os.getenv('SERVER_TIMING', '0') == '1'
+# If set, /metrics requires "Authorization: Bearer <token>"
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+# Uploads are parsed from memory; stop extracting once this much text is collected for ATS scans.
+# Job descriptions are cut to the same length.
+app.config['ATS_MAX_TEXT_CHARS'] = int(os.getenv('ATS_MAX_TEXT_CHARS', '100000'))
+# Per-request NLP budget: seconds, and worker RSS in MB (0 disables). Past it, scans finish
+# with the regex fallback and the report is marked "degraded" rather than the worker dying.
+app.config['ATS_TIME_BUDGET'] = float(os.getenv('ATS_TIME_BUDGET', '20'))
+app.config['ATS_MAX_RSS_MB'] = int(os.getenv('ATS_MAX_RSS_MB', '1024'))
+
+# Bulk ATS scanning: resumes per nlp.pipe batch. spaCy's n_process > 1 forks with the default
+# start method, which isn't safe in a threaded web worker, so bulk scans stay in-process.
+app.config['ATS_BATCH_SIZE'] = int(os.getenv('ATS_BATCH_SIZE', '32'))
+# Keywords compared by ATS scans and JD matching: "auto", "skills" or "lemmas" (see ATSScanner)
+app.config['ATS_KEYWORD_MODE'] = os.getenv('ATS_KEYWORD_MODE', 'auto')
+# Hybrid AI analysis: Gemini only writes tips, roles and missing-skill advice; skills come from the ATS scan
+app.config['AI_HYBRID'] = os.getenv('AI_HYBRID', '1') == '1'
+# Answer a resubmitted resume + JD pair from the stored Analysis instead of re-running it
+app.config['ANALYSIS_REUSE'] = os.getenv('ANALYSIS_REUSE', '1') == '1'
+# Most sentences accepted by one /improve_sentences call
+app.config['MAX_SENTENCES'] = int(os.getenv('MAX_SENTENCES', '50'))
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Background jobs for the upload routes; state is shared across workers via SQLite
+job_queue = JobQueue(
+    os.getenv('JOBS_DB', os.path.join(tempfile.gettempdir(), 'smartjob_jobs.db')),
+    max_workers=int(os.getenv('JOB_WORKERS', '4')),
+    # Jobs with no progress for this long are reported failed (e.g. their worker was restarted)
+    stale_after=int(os.getenv('JOB_STALE_AFTER', '900'))
+)
+
+def read_upload(file):
+    """Return (file_type, bytes) for an upload, read straight from the request stream."""
+    file_type = file.filename.rsplit('.', 1)[1].lower()
+    return file_type, file.read()
+
+def run_analysis(file_type, data):
+    """/analyze pipeline: extract -> Gemini. Raises ValueError for unreadable files."""
+    # The prompt builder picks sections from the whole resume, so extract as much as an ATS scan
+    text = extract_text(file_type, data, max_chars=app.config['ATS_MAX_TEXT_CHARS'])
+    if not text.strip():
+        raise ValueError("Could not extract text from file.")
+
+    # Basic AI Analysis (Original Behavior)
+    try:
+        return analyze_with_ai(text)
+    except Exception as e:
+        print(f"Error in /analyze: {e}")
+        return {"error": f"Failed to analyze resume {str(e)}"}
+
+def request_budget():
+    """Time/memory allowance for one request's NLP work (see ats_engine.ResourceBudget)."""
+    return ResourceBudget(max_seconds=app.config['ATS_TIME_BUDGET'], max_rss_mb=app.config['ATS_MAX_RSS_MB'])
+
+def run_ats_scan(file_type, data, jd_text):
+    """Local half of /analyze_ats: extract -> ATS scan. Returns (resume, report); fast, no LLM.
+
+    resume is the resume analysis (text, name, keywords, skills) the report was built from.
+    """
+    text = extract_text(file_type, data, max_chars=app.config['ATS_MAX_TEXT_CHARS'])
+    if not text.strip():
+        raise ValueError("Could not extract text from file.")
+
+    # ATS Engine Scanning (one spaCy parse each for resume and JD); the resume analysis is
+    # kept for the AI step, since degraded or evicted analyses can't be fetched again cheaply
+    scanner = ATSScanner(keyword_mode=app.config['ATS_KEYWORD_MODE'], budget=request_budget())
+    resume = scanner.analyze_cached(text)
+    return resume, scanner.build_report(resume, scanner.analyze_jd(jd_text))
+
+def local_findings(resume, report):
+    """What the ATS scan already knows, handed to Gemini so it doesn't re-extract it."""
+    return {
+        "skills": get_skill_matcher().categorize(resume["skills"]),
+        "missing_keywords": report["keywords"]["missing"],
+        "missing_sections": [name for name, status in report["sections"].items() if status == "Missing"]
+    }
+
+def ai_ats_analysis(resume, jd_text, report):
+    """Gemini half of /analyze_ats; in hybrid mode skills come from the local scan."""
+    local = local_findings(resume, report) if app.config['AI_HYBRID'] else None
+    return analyze_with_ai_ats(resume["text"], jd_text, local=local)
+
+def run_ats_analysis(file_type, data, jd_text, progress=None):
+    """/analyze_ats pipeline: extract -> ATS scan -> Gemini. Raises ValueError for unreadable files.
+
+    progress, if given, receives the deterministic report before the AI call starts.
+    """
+    resume, final_report = run_ats_scan(file_type, data, jd_text)
+    if progress:
+        progress(final_report)
+
+    # AI Analysis
+    final_report["ai_analysis"] = ai_ats_analysis(resume, jd_text, final_report)
+    return final_report
+
+def stream_ats_analysis(file_type, data, jd_text, on_complete=None):
+    """Streaming /analyze_ats: one JSON line with the ATS block now, one with the AI block later.
+
+    on_complete, if given, receives the finished report and returns extra fields for the AI line.
+    """
+    resume, report = run_ats_scan(file_type, data, jd_text)
+
+    def generate():
+        yield json.dumps({"type": "ats", **report}) + "\n"
+        report["ai_analysis"] = ai_ats_analysis(resume, jd_text, report)
+        extra = on_complete(report) if on_complete else {}
+        yield json.dumps({"type": "ai", "ai_analysis": report["ai_analysis"], **extra}) + "\n"
+
+    return ndjson_response(generate())
+
+def ndjson_response(lines):
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def analysis_fingerprint():
+    """Everything besides the resume and JD that an /analyze_ats result depends on."""
+    return make_key(get_skill_matcher().fingerprint, json.dumps(SCORE_WEIGHTS, sort_keys=True),
+                    app.config['ATS_KEYWORD_MODE'], int(app.config['AI_HYBRID']),
+                    ATS_PROMPT_VERSION, RESUME_PROMPT_TOKENS, JD_PROMPT_TOKENS)
+
+def analysis_hashes(data, jd_text):
+    """(file_digest, jd_hash) identifying a resume + JD pair in the Analysis table.
+
+    jd_hash also covers analysis_fingerprint(), so a changed taxonomy, weights or prompt
+    stops older stored analyses from being reused.
+    """
+    return file_digest(data), make_key("jd", analysis_fingerprint(), jd_text)
+
+def find_reusable_analysis(digest, jd_hash):
+    """Most recent stored analysis of this resume + JD whose AI part succeeded, if any."""
+    recent = (Analysis.query.filter_by(file_digest=digest, jd_hash=jd_hash)
+              .order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(5).all())
+    for analysis in recent:
+        if analysis.ai_analysis and not analysis.ai_analysis.get("error"):
+            return analysis
+    return None
+
+def save_analysis(user_id, filename, digest, jd_hash, report):
+    """Store a finished report; returns the new id (None if saving failed or it was skipped).
+
+    Degraded reports (budget ran out, partly regex fallback) are not stored: they depend on
+    the load at the time, and a stored row would be reused for every later identical submission.
+    Runs in job worker threads too, so it opens its own app context.
+    """
+    if report.get("degraded"):
+        return None
+    try:
+        with app.app_context():
+            analysis = Analysis(
+                user_id=user_id, filename=filename, file_digest=digest, jd_hash=jd_hash,
+                total_score=report["score"]["total_score"], score=report["score"], info=report["info"],
+                sections=report["sections"], keywords=report["keywords"], ai_analysis=report.get("ai_analysis")
+            )
+            db.session.add(analysis)
+            db.session.commit()
+            return analysis.id
+    except Exception as e:
+        logger.warning(f"Could not save analysis: {e}")
+        return None
+
+def run_and_save_ats_analysis(user_id, filename, digest, jd_hash, file_type, data, jd_text, progress=None):
+    """run_ats_analysis, then persist the report to the user's history."""
+    report = run_ats_analysis(file_type, data, jd_text, progress)
+    report["analysis_id"] = save_analysis(user_id, filename, digest, jd_hash, report)
+    return report
+
+def reused_result(result):
+    """Job body for a resubmitted resume + JD: the stored result, no extraction or LLM call."""
+    return result
+
+# Per-process JD index; each worker brings it in line with the job_description table before querying
+jd_index = JDIndex(ATSScanner(keyword_mode=app.config['ATS_KEYWORD_MODE']))
+_jd_index_lock = threading.Lock()
+
+def sync_jd_index():
+    """Add JDs stored by any worker since the last sync and drop deleted ones."""
+    with _jd_index_lock:
+        stored = {row.id for row in db.session.query(JobDescription.id)}
+        for jd_id in set(jd_index.ids()) - stored:
+            jd_index.remove(jd_id)
+        new_ids = stored - set(jd_index.ids())
+        if new_ids:
+            rows = (db.session.query(JobDescription.id, JobDescription.user_id, JobDescription.source,
+                                     JobDescription.terms)
+                    .filter(JobDescription.id.in_(new_ids)))
+            for jd_id, user_id, source, terms in rows:
+                jd_index.add(jd_id, source=source, terms=terms, owner=user_id)
+
+def request_flag(name):
+    return request.args.get(name) == '1' or request.form.get(name) == '1'
+
+def wants_async():
+    return request_flag('async')
+
+def enqueue_job(kind, fn, *args, with_progress=False):
+    """Queue an analysis and answer 202 with where to poll or stream its result."""
+    user_id = current_user.id if current_user.is_authenticated else None
+    job_id = job_queue.submit(kind, fn, *args, user_id=user_id, with_progress=with_progress)
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": url_for('job_status', job_id=job_id),
+        "events_url": url_for('job_events', job_id=job_id)
+    }), 202
+
+def get_user_job(job_id):
+    """Look up a job, hiding jobs that belong to another user."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return None
+    if job["user_id"] is not None and (not current_user.is_authenticated or current_user.id != job["user_id"]):
+        return None
+    return job
+
+def job_payload(job):
+    return {"job_id": job["id"], "status": job["status"], "result": job["result"], "error": job["error"]}
+
 # Routes
 @app.route('/')
 def index():
@@ -139,30 +458,14 @@ def analyze():
         return jsonify({"error": "No file selected"}), 400
         
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        text = ""
-        if filename.endswith('.pdf'):
-            text = extract_text_from_pdf(filepath)
-        elif filename.endswith('.docx'):
-            text = extract_text_from_docx(filepath)
-            
-        if not text.strip():
-            return jsonify({"error": "Could not extract text from file."}), 400
-            
-        # Basic AI Analysis (Original Behavior)
-        try:
-            ai_analysis = analyze_with_ai(text)
-        except Exception as e:
-             print(f"Error in /analyze: {e}")
-             ai_analysis = {"error": f"Failed to analyze resume {str(e)}"}
+        file_type, data = read_upload(file)
+        if wants_async():
+            return enqueue_job('analyze', run_analysis, file_type, data)
 
         try:
-            os.remove(filepath)
-        except:
-            pass
+            ai_analysis = run_analysis(file_type, data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
             
         return jsonify(ai_analysis)
     
@@ -176,57 +479,189 @@ def analyze_ats():
         return jsonify({"error": "No file uploaded"}), 400
     
     file = request.files['resume']
-    jd_text = request.form.get('job_description', '')
+    jd_text = request.form.get('job_description', '')[:app.config['ATS_MAX_TEXT_CHARS']]
     
     if file.filename == '':
         return jsonify({"error": "No file selected"}), 400
         
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Extract Text
-        text = ""
-        if filename.endswith('.pdf'):
-            text = extract_text_from_pdf(filepath)
-        elif filename.endswith('.docx'):
-            text = extract_text_from_docx(filepath)
-            
-        if not text.strip():
-            return jsonify({"error": "Could not extract text from file."}), 400
-            
-        # ATS Engine Scanning
-        scanner = ATSScanner()
-        info_dict = scanner.parse_resume_info(text)
-        sections_dict = scanner.detect_sections(text)
-        resume_kws = scanner.extract_keywords(text)
-        jd_kws = scanner.extract_keywords(jd_text)
-        
-        keyword_analysis = scanner.compare_keywords(resume_kws, jd_kws)
-        ats_score = scanner.calculate_score(keyword_analysis, sections_dict, info_dict)
-            
-        # AI Analysis
-        ai_analysis = analyze_with_ai_ats(text, jd_text)
-
-        final_report = {
-            "info": info_dict,
-            "sections": sections_dict,
-            "keywords": keyword_analysis,
-            "score": ats_score,
-            "ai_analysis": ai_analysis
-        }
+        file_type, data = read_upload(file)
+        digest, jd_hash = analysis_hashes(data, jd_text)
+
+        # Same resume + JD seen before: answer from history instead of re-running everything
+        stored = find_reusable_analysis(digest, jd_hash) if app.config['ANALYSIS_REUSE'] else None
+        if stored is not None:
+            if stored.user_id != current_user.id:
+                stored_id = save_analysis(current_user.id, file.filename, digest, jd_hash, stored.result())
+                stored = db.session.get(Analysis, stored_id) if stored_id else stored
+            result = dict(stored.result(), reused=True)
+            if wants_async():
+                return enqueue_job('analyze_ats', reused_result, result)
+            if request_flag('stream'):
+                ats = {k: v for k, v in result.items() if k != "ai_analysis"}
+                return ndjson_response(iter([
+                    json.dumps({"type": "ats", **ats}) + "\n",
+                    json.dumps({"type": "ai", "ai_analysis": result["ai_analysis"], "analysis_id": result["analysis_id"]}) + "\n"
+                ]))
+            return jsonify(result)
+
+        user_id = current_user.id
+        if wants_async():
+            return enqueue_job('analyze_ats', run_and_save_ats_analysis, user_id, file.filename, digest, jd_hash,
+                               file_type, data, jd_text, with_progress=True)
 
-        # Cleanup
         try:
-            os.remove(filepath)
-        except:
-            pass
+            if request_flag('stream'):
+                return stream_ats_analysis(file_type, data, jd_text, on_complete=lambda report: {
+                    "analysis_id": save_analysis(user_id, file.filename, digest, jd_hash, report)})
+            final_report = run_and_save_ats_analysis(user_id, file.filename, digest, jd_hash, file_type, data, jd_text)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
             
         return jsonify(final_report)
     
     return jsonify({"error": "Invalid file type"}), 400
 
+@app.route('/history')
+@login_required
+def history():
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 20, type=int), 100)
+    # Served from ix_analysis_user_created; the JSON columns aren't loaded for the listing
+    query = (Analysis.query.filter_by(user_id=current_user.id)
+             .options(db.load_only(Analysis.id, Analysis.filename, Analysis.total_score, Analysis.created_at))
+             .order_by(Analysis.created_at.desc(), Analysis.id.desc()))
+    result = query.paginate(page=page, per_page=per_page, error_out=False)
+    return jsonify({
+        "items": [analysis.summary() for analysis in result.items],
+        "page": result.page,
+        "per_page": result.per_page,
+        "total": result.total,
+        "pages": result.pages
+    })
+
+@app.route('/history/<int:analysis_id>')
+@login_required
+def history_item(analysis_id):
+    analysis = db.session.get(Analysis, analysis_id)
+    if analysis is None or analysis.user_id != current_user.id:
+        return jsonify({"error": "Analysis not found"}), 404
+    return jsonify(analysis.result())
+
+@app.route('/jds', methods=['GET', 'POST'])
+@login_required
+def job_descriptions():
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        text = (data.get('text') or '')[:app.config['ATS_MAX_TEXT_CHARS']].strip()
+        if not text:
+            return jsonify({"error": "No job description provided"}), 400
+        source, terms = jd_index.extract(text)
+        if not terms:
+            return jsonify({"error": "No keywords found in job description."}), 400
+        jd = JobDescription(user_id=current_user.id, title=data.get('title'), text=text, source=source, terms=terms)
+        db.session.add(jd)
+        db.session.commit()
+        jd_index.add(jd.id, source=source, terms=terms, owner=current_user.id)
+        return jsonify(dict(jd.summary(), source=source, terms=terms)), 201
+
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 20, type=int), 100)
+    query = (JobDescription.query.filter_by(user_id=current_user.id)
+             .options(db.load_only(JobDescription.id, JobDescription.title, JobDescription.created_at))
+             .order_by(JobDescription.id.desc()))
+    result = query.paginate(page=page, per_page=per_page, error_out=False)
+    return jsonify({"items": [jd.summary() for jd in result.items], "page": result.page,
+                    "per_page": result.per_page, "total": result.total, "pages": result.pages})
+
+@app.route('/jds/<int:jd_id>', methods=['DELETE'])
+@login_required
+def delete_job_description(jd_id):
+    jd = db.session.get(JobDescription, jd_id)
+    if jd is None or jd.user_id != current_user.id:
+        return jsonify({"error": "Job description not found"}), 404
+    db.session.delete(jd)
+    db.session.commit()
+    jd_index.remove(jd_id)
+    return jsonify({"success": True})
+
+@app.route('/jds/match', methods=['POST'])
+@login_required
+def match_job_descriptions():
+    """Rank the current user's stored job descriptions against an uploaded resume."""
+    file = request.files.get('resume')
+    if file is None or file.filename == '':
+        return jsonify({"error": "No file uploaded"}), 400
+    if not allowed_file(file.filename):
+        return jsonify({"error": "Invalid file type"}), 400
+
+    text = extract_text(*read_upload(file), max_chars=app.config['ATS_MAX_TEXT_CHARS'])
+    if not text.strip():
+        return jsonify({"error": "Could not extract text from file."}), 400
+
+    k = max(1, min(request.args.get('k', 10, type=int), 100))
+    sync_jd_index()
+    with metrics.timed("jd_match"):
+        hits = jd_index.query(text, k=k, owner=current_user.id)
+    titles = dict(db.session.query(JobDescription.id, JobDescription.title)
+                  .filter(JobDescription.id.in_([hit["jd_id"] for hit in hits])))
+    for hit in hits:
+        hit["title"] = titles.get(hit["jd_id"])
+    return jsonify({"results": hits, "indexed": jd_index.count(owner=current_user.id)})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = get_user_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_payload(job))
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events stream of job status changes, ending once the job finishes."""
+    if get_user_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream():
+        for job in job_queue.watch(job_id):
+            yield f"event: status\ndata: {json.dumps(job_payload(job))}\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/analyze_ats_bulk', methods=['POST'])
+@login_required
+def analyze_ats_bulk():
+    files = [f for f in request.files.getlist('resumes') if f.filename]
+    jd_text = request.form.get('job_description', '')[:app.config['ATS_MAX_TEXT_CHARS']]
+
+    if not files:
+        return jsonify({"error": "No files uploaded"}), 400
+
+    filenames, texts, errors = [], [], []
+    for file in files:
+        if not allowed_file(file.filename):
+            errors.append({"filename": file.filename, "error": "Invalid file type"})
+            continue
+        text = extract_text(*read_upload(file), max_chars=app.config['ATS_MAX_TEXT_CHARS'])
+        if not text.strip():
+            errors.append({"filename": file.filename, "error": "Could not extract text from file."})
+            continue
+        filenames.append(file.filename)
+        texts.append(text)
+
+    # Rank with the deterministic ATS engine only; a Gemini call per resume would not scale
+    scanner = ATSScanner(keyword_mode=app.config['ATS_KEYWORD_MODE'], budget=request_budget())
+    reports = scanner.scan_many(texts, jd_text, batch_size=app.config['ATS_BATCH_SIZE'])
+
+    results = []
+    for rank, report in enumerate(reports, start=1):
+        report["filename"] = filenames[report.pop("index")]
+        report["rank"] = rank
+        results.append(report)
+
+    return jsonify({"results": results, "errors": errors})
+
 @app.route('/improve_sentence', methods=['POST'])
 @login_required
 def improve_sentence():
@@ -238,37 +673,86 @@ def improve_sentence():
     improved = improve_sentence_ai(sentence)
     return jsonify({"original": sentence, "improved": improved})
 
+@app.route('/improve_sentences', methods=['POST'])
+@login_required
+def improve_sentences():
+    data = request.get_json(silent=True) or {}
+    sentences = data.get('sentences')
+    if not isinstance(sentences, list) or not sentences or not all(isinstance(s, str) and s.strip() for s in sentences):
+        return jsonify({"error": "Provide a non-empty list of sentences"}), 400
+    if len(sentences) > app.config['MAX_SENTENCES']:
+        return jsonify({"error": f"At most {app.config['MAX_SENTENCES']} sentences per request"}), 400
+
+    improved = improve_sentences_ai(sentences)
+    return jsonify({"results": [{"original": o, "improved": i} for o, i in zip(sentences, improved)]})
+
+@app.route('/cache_stats')
+@login_required
+def cache_stats():
+    return jsonify({"ai": AI_CACHE.stats(), "text": TEXT_CACHE.stats(), "analysis": ANALYSIS_CACHE.stats(),
+                    "sentence": SENTENCE_CACHE.stats(), "report": REPORT_CACHE.stats()})
+
+@metrics.register_collector
+def cache_and_llm_metrics():
+    caches = {"ai": AI_CACHE, "text": TEXT_CACHE, "analysis": ANALYSIS_CACHE, "sentence": SENTENCE_CACHE,
+              "report": REPORT_CACHE}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    families = [
+        ("smartjob_cache_hits_total", "counter", "Cache lookups that found an entry.",
+         [([("cache", name)], s["hits"]) for name, s in stats.items()]),
+        ("smartjob_cache_misses_total", "counter", "Cache lookups that found nothing.",
+         [([("cache", name)], s["misses"]) for name, s in stats.items()]),
+        ("smartjob_cache_hit_ratio", "gauge", "Hits divided by lookups since process start.",
+         [([("cache", name)], s["hit_rate"]) for name, s in stats.items()]),
+        ("smartjob_cache_entries", "gauge", "Entries held in the in-memory tier.",
+         [([("cache", name)], s["memory_size"]) for name, s in stats.items()]),
+    ]
+    llm = gemini.stats
+    families += [
+        ("smartjob_llm_requests_total", "counter", "HTTP requests sent to Gemini, retries included.", [([], llm["requests"])]),
+        ("smartjob_llm_retries_total", "counter", "Gemini calls retried after a transient failure.", [([], llm["retries"])]),
+        ("smartjob_llm_errors_total", "counter", "Gemini calls that failed after all retries.", [([], llm["errors"])]),
+        ("smartjob_llm_tokens_total", "counter", "Tokens billed by Gemini (usageMetadata).",
+         [([("kind", "prompt")], llm["prompt_tokens"]), ([("kind", "output")], llm["output_tokens"])]),
+        ("smartjob_llm_json_total", "counter", "Structured LLM replies by outcome (parsed, repaired, incomplete, failed).",
+         [([("outcome", outcome)], count) for outcome, count in structured_output.stats.items()]),
+    ]
+    return families
+
+@app.route('/metrics')
+def metrics_endpoint():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def render_report_job(data, download_url):
+    """Background job body for async report downloads: render into the report cache."""
+    pdf = get_report_pdf(data)
+    return {"download_url": download_url, "size": len(pdf)}
+
 @app.route('/download_report', methods=['POST'])
 @login_required
 def download_report():
-    data = request.json
-    if not data:
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
         return jsonify({"error": "No report data provided"}), 400
-        
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(50, 750, "ATS Resume Analysis Report")
-    
-    p.setFont("Helvetica-Bold", 14)
-    y = 710
-    score_info = data.get('score', {})
-    total_score = score_info.get('total_score', 'N/A')
-    p.drawString(50, y, f"Overall ATS Score: {total_score}/100")
-    
-    y -= 30
-    p.setFont("Helvetica", 12)
-    p.drawString(50, y, "Keyword Match Analysis:")
-    y -= 20
-    kws = data.get('keywords', {}).get('matched', [])
-    kw_text = ", ".join(kws[:15]) + ("..." if len(kws)>15 else "")
-    p.drawString(70, y, f"Matches: {kw_text}")
-    
-    p.showPage()
-    p.save()
-    
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name="ATS_Report.pdf", mimetype='application/pdf')
+
+    # Large bulk exports can be rendered in the background and fetched from /reports/<key>
+    if wants_async():
+        download_url = url_for('report_download', report_key=report_key(data))
+        return enqueue_job('report', render_report_job, data, download_url)
+
+    pdf = get_report_pdf(data)
+    return send_file(BytesIO(pdf), as_attachment=True, download_name="ATS_Report.pdf", mimetype='application/pdf')
+
+@app.route('/reports/<report_key>')
+@login_required
+def report_download(report_key):
+    pdf = REPORT_CACHE.get(report_key)
+    if pdf is None:
+        return jsonify({"error": "Report not found or expired"}), 404
+    return send_file(BytesIO(pdf), as_attachment=True, download_name="ATS_Report.pdf", mimetype='application/pdf')
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,28 +1,402 @@
-import spacy
+import os
 import re
+import threading
+import time
 from collections import Counter
 
-# Load spaCy NLP model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except:
-    print("Warning: spaCy model en_core_web_sm not found. Falling back to basic regex extraction.")
-    nlp = None
+import metrics
+from cache import ResultCache, make_key
+
+# Pipeline components the scanner never reads from. Names come from NER and
+# keywords from the tagger/lemmatizer, so the dependency parser is dead weight.
+UNUSED_PIPES = ["parser"]
+
+# Defaults for streaming many documents through nlp.pipe
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_N_PROCESS = 1
+
+# Memory-bounded analysis: at most NLP_MAX_CHARS of a document are analyzed, in chunks of
+# NLP_CHUNK_CHARS streamed through nlp.pipe NLP_PIPE_BATCH at a time, so a huge upload or
+# JD never becomes one giant Doc
+NLP_MAX_CHARS = int(os.getenv("ATS_NLP_MAX_CHARS", "100000"))
+NLP_CHUNK_CHARS = int(os.getenv("ATS_NLP_CHUNK_CHARS", "20000"))
+NLP_PIPE_BATCH = int(os.getenv("ATS_NLP_PIPE_BATCH", "2"))
+
+# spaCy and its model are loaded on first use rather than at import, so routes that never
+# scan (login, static pages) don't pay for them. Under gunicorn --preload, app.warmup()
+# loads them once in the master and workers share the pages copy-on-write.
+_nlp = None
+_nlp_loaded = False
+_skill_matcher = None
+_load_lock = threading.Lock()
+
+def get_nlp():
+    """Return the shared spaCy pipeline, loading it on first call; None if the model is missing."""
+    global _nlp, _nlp_loaded
+    if not _nlp_loaded:
+        with _load_lock:
+            if not _nlp_loaded:
+                # Load spaCy NLP model
+                try:
+                    import spacy
+                    _nlp = spacy.load("en_core_web_sm", exclude=UNUSED_PIPES)
+                except:
+                    print("Warning: spaCy model en_core_web_sm not found. Falling back to basic regex extraction.")
+                    _nlp = None
+                _nlp_loaded = True
+    return _nlp
+
+def current_rss():
+    """Resident set size of this process in bytes (from /proc/self/statm), or None where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class ResourceBudget:
+    """Per-request allowance for NLP work: a wall-clock deadline and a process RSS ceiling.
+
+    Once exceeded, the scanner finishes with the regex fallback instead of spaCy.
+    RSS is process-wide, so with threaded workers the ceiling guards the worker, not one request.
+    """
+
+    def __init__(self, max_seconds=None, max_rss_mb=None):
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+
+    def exceeded(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            return True
+        if self.max_rss is not None:
+            rss = current_rss()
+            return rss is not None and rss > self.max_rss
+        return False
+
+def chunk_text(text, chunk_chars):
+    """Split text into pieces of at most chunk_chars, breaking after a newline (or space) when possible."""
+    start = 0
+    while start < len(text):
+        end = start + chunk_chars
+        if end < len(text):
+            cut = text.rfind("\n", start, end)
+            if cut <= start:
+                cut = text.rfind(" ", start, end)
+            if cut > start:
+                end = cut + 1
+        yield text[start:end]
+        start = end
+
+# Analyzed documents keyed by a hash of their text, so re-scoring the same resume (or JD)
+# skips spaCy entirely. ATS_CACHE_DOCS=1 also keeps the Doc itself (DocBin bytes).
+ANALYSIS_CACHE = ResultCache(
+    max_entries=int(os.getenv("ATS_CACHE_SIZE", "256")),
+    ttl=int(os.getenv("ATS_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("ATS_CACHE_DB") or None,
+    disk_max_entries=int(os.getenv("ATS_CACHE_DISK_SIZE", "5000"))
+)
+CACHE_DOCS = os.getenv("ATS_CACHE_DOCS", "0") == "1"
 
 BASIC_STOP_WORDS = {"a", "about", "above", "after", "again", "against", "all", "am", "an", "and", "any", "are", "aren't", "as", "at", "be", "because", "been", "before", "being", "below", "between", "both", "but", "by", "can't", "cannot", "could", "couldn't", "did", "didn't", "do", "does", "doesn't", "doing", "don't", "down", "during", "each", "few", "for", "from", "further", "had", "hadn't", "has", "hasn't", "have", "haven't", "having", "he", "he'd", "he'll", "he's", "her", "here", "here's", "hers", "herself", "him", "himself", "his", "how", "how's", "i", "i'd", "i'll", "i'm", "i've", "if", "in", "into", "is", "isn't", "it", "it's", "its", "itself", "let's", "me", "more", "most", "mustn't", "my", "myself", "no", "nor", "not", "of", "off", "on", "once", "only", "or", "other", "ought", "our", "ours", "ourselves", "out", "over", "own", "same", "shan't", "she", "she'd", "she'll", "she's", "should", "shouldn't", "so", "some", "such", "than", "that", "that's", "the", "their", "theirs", "them", "themselves", "then", "there", "there's", "these", "they", "they'd", "they'll", "they're", "they've", "this", "those", "through", "to", "too", "under", "until", "up", "very", "was", "wasn't", "we", "we'd", "we'll", "we're", "we've", "were", "weren't", "what", "what's", "when", "when's", "where", "where's", "which", "while", "who", "who's", "whom", "why", "why's", "with", "won't", "would", "wouldn't", "you", "you'd", "you'll", "you're", "you've", "your", "yours", "yourself", "yourselves", "experience", "education", "skills", "projects", "work", "year", "years", "month", "months"}
 
+SKILLS_FILE = os.getenv("ATS_SKILLS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills.txt"))
+
+def load_skill_taxonomy(path):
+    """Read a skills file into {category: [[canonical, alias, ...], ...]} (see skills.txt for the format)."""
+    taxonomy = {}
+    category = "Other"
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                category = line[1:-1].strip()
+                continue
+            terms = [t.strip() for t in line.split("|") if t.strip()]
+            taxonomy.setdefault(category, []).append(terms)
+    return taxonomy
+
+class SkillMatcher:
+    """Finds single- and multi-token skills from a taxonomy in one pass with spaCy's PhraseMatcher.
+
+    Only tokenization is needed, so it runs on the tokenizer alone (no tagging) and
+    can also reuse Docs that were already parsed. Overlapping hits keep the longest span.
+    """
+
+    def __init__(self, taxonomy, tokenizer_nlp):
+        from spacy.matcher import PhraseMatcher
+
+        self.nlp = tokenizer_nlp
+        self.category_of = {}
+        # Case-insensitive by default; "="-prefixed terms must match the exact spelling
+        self._matchers = [PhraseMatcher(self.nlp.vocab, attr="LOWER"), PhraseMatcher(self.nlp.vocab, attr="ORTH")]
+        # Identifies the taxonomy so cached analyses are invalidated when it changes
+        self.fingerprint = make_key(*(term for entries in taxonomy.values() for terms in entries for term in terms))
+        for category, entries in taxonomy.items():
+            for terms in entries:
+                canonical = terms[0].lstrip("=")
+                self.category_of[canonical] = category
+                for term in terms:
+                    exact = term.startswith("=")
+                    pattern = self.nlp.make_doc(term.lstrip("="))
+                    self._matchers[1 if exact else 0].add(canonical, [pattern])
+
+    def find(self, text_or_doc):
+        """Return canonical skill names in order of first appearance."""
+        if not text_or_doc:
+            return []
+        from spacy.util import filter_spans
+
+        doc = self.nlp.make_doc(text_or_doc) if isinstance(text_or_doc, str) else text_or_doc
+        spans = []
+        for matcher in self._matchers:
+            spans.extend(matcher(doc, as_spans=True))
+        spans = sorted(filter_spans(spans), key=lambda span: span.start)
+        return list(dict.fromkeys(span.label_ for span in spans))
+
+    def categorize(self, skills):
+        """Group canonical skill names by taxonomy category."""
+        grouped = {}
+        for skill in skills:
+            grouped.setdefault(self.category_of.get(skill, "Other"), []).append(skill)
+        return grouped
+
+def get_skill_matcher():
+    """Return the shared SkillMatcher, compiling it once on first call.
+
+    It shares the model's vocab so it can run on already-parsed Docs; without the model
+    the blank English tokenizer is enough for matching.
+    """
+    global _skill_matcher
+    if _skill_matcher is None:
+        nlp = get_nlp()
+        with _load_lock:
+            if _skill_matcher is None:
+                if nlp is None:
+                    import spacy
+                    nlp = spacy.blank("en")
+                _skill_matcher = SkillMatcher(load_skill_taxonomy(SKILLS_FILE), nlp)
+    return _skill_matcher
+
+SECTION_KEYWORDS = {
+    "Contact info": ["email", "phone", "linkedin", "github", "address", "mobile", "contact"],
+    "Skills": ["skills", "core competencies", "technical skills", "expertise"],
+    "Experience": ["experience", "employment", "work history", "professional background"],
+    "Education": ["education", "academic", "degree", "university", "college"],
+    "Projects": ["projects", "personal projects", "academic projects", "portfolio"],
+    "Certifications": ["certifications", "certificates", "licenses", "courses"]
+}
+
+def compile_section_pattern(sections_keywords):
+    """Compile every section header keyword into one multiline alternation.
+
+    A header is a line holding only the keyword, optionally decorated with leading
+    whitespace/#/*/- and trailing whitespace/colons. Each section gets a named group
+    (s0, s1, ...) so a single finditer pass tells which section every header belongs to.
+    """
+    groups = []
+    for i, keywords in enumerate(sections_keywords.values()):
+        alternation = "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+        groups.append(f"(?P<s{i}>{alternation})")
+    return re.compile(r'^[\s#\*\-]*(?:' + "|".join(groups) + r')[\s:]*$', re.MULTILINE | re.IGNORECASE)
+
+SECTION_PATTERN = compile_section_pattern(SECTION_KEYWORDS)
+
+# Score components out of 100, shared by calculate_score and the vectorized calculate_scores
+# (both also accept their own weights). contact is split evenly between email and phone;
+# format_penalty comes off format when neither an email nor a name could be found.
+SCORE_WEIGHTS = {"keyword": 40, "section": 30, "contact": 15, "format": 15, "format_penalty": 10}
+
+# Sections that count towards the section score
+EXPECTED_SECTIONS = ["Experience", "Education", "Skills", "Projects"]
+
 class ATSScanner:
-    def __init__(self):
-        self.sections_keywords = {
-            "Contact info": ["email", "phone", "linkedin", "github", "address", "mobile", "contact"],
-            "Skills": ["skills", "core competencies", "technical skills", "expertise"],
-            "Experience": ["experience", "employment", "work history", "professional background"],
-            "Education": ["education", "academic", "degree", "university", "college"],
-            "Projects": ["projects", "personal projects", "academic projects", "portfolio"],
-            "Certifications": ["certifications", "certificates", "licenses", "courses"]
+    def __init__(self, keyword_mode="auto", budget=None):
+        # "skills": compare taxonomy skills only; "lemmas": compare noun/adjective lemmas only;
+        # "auto": skills when the JD names any, lemmas otherwise (e.g. very generic JDs)
+        self.keyword_mode = keyword_mode
+        self.sections_keywords = SECTION_KEYWORDS
+        self.section_pattern = SECTION_PATTERN
+        # Optional ResourceBudget; when it runs out, analysis degrades to the regex fallback
+        self.budget = budget
+
+    def _over_budget(self):
+        return self.budget is not None and self.budget.exceeded()
+
+    def analyze(self, text):
+        """Parse text with spaCy and derive the name, keywords and skills.
+
+        Only the first NLP_MAX_CHARS are analyzed. Short texts are parsed as one Doc; longer
+        ones are streamed through nlp.pipe in chunks. If the budget runs out the remaining
+        text gets the regex fallback and the analysis is marked "degraded".
+        """
+        capped = (text or "")[:NLP_MAX_CHARS]
+        nlp = get_nlp()
+        if nlp is not None and len(capped) > NLP_CHUNK_CHARS:
+            analysis = self._analyze_chunked(capped, nlp)
+        elif nlp is not None and self._over_budget():
+            analysis = dict(self._analysis_from_doc(None, capped), degraded=True)
+        else:
+            analysis = self._analysis_from_doc(self._parse(capped), capped)
+        analysis["text"] = text
+        return analysis
+
+    def _analyze_chunked(self, text, nlp):
+        """Stream chunks through nlp.pipe, merging keywords/skills as each Doc is processed and dropped."""
+        chunks = list(chunk_text(text, NLP_CHUNK_CHARS))
+        name = None
+        keywords = {}
+        skills = {}
+        done = 0
+        with metrics.timed("nlp_parse"):
+            for chunk, doc in zip(chunks, nlp.pipe(chunks, batch_size=NLP_PIPE_BATCH)):
+                if done == 0:
+                    name = self._name_from_doc(doc, chunk)
+                keywords.update(dict.fromkeys(self._keywords_from_doc(doc, chunk)))
+                skills.update(dict.fromkeys(self._find_skills(doc)))
+                done += 1
+                if done < len(chunks) and self._over_budget():
+                    break
+
+        analysis = {"name": name}
+        if done < len(chunks):
+            for chunk in chunks[done:]:
+                keywords.update(dict.fromkeys(self._keywords_from_doc(None, chunk)))
+                skills.update(dict.fromkeys(self._find_skills(chunk)))
+            analysis["degraded"] = True
+        analysis["keywords"] = list(keywords)
+        analysis["skills"] = list(skills)
+        return analysis
+
+    def _parse(self, text):
+        """Run the spaCy pipeline over text (None without the model or text)."""
+        nlp = get_nlp()
+        if not nlp or not text:
+            return None
+        with metrics.timed("nlp_parse"):
+            return nlp(text)
+
+    def _analysis_from_doc(self, doc, text):
+        return {
+            "text": text,
+            "name": self._name_from_doc(doc, text),
+            "keywords": self._keywords_from_doc(doc, text),
+            "skills": self._find_skills(doc if doc is not None else text)
         }
 
-    def parse_resume_info(self, text):
+    def _find_skills(self, text_or_doc):
+        with metrics.timed("skill_match"):
+            matcher = get_skill_matcher()
+            if not isinstance(text_or_doc, str) or len(text_or_doc) <= NLP_CHUNK_CHARS:
+                return matcher.find(text_or_doc)
+            # Tokenize long raw text a chunk at a time instead of as one huge Doc
+            skills = {}
+            for chunk in chunk_text(text_or_doc[:NLP_MAX_CHARS], NLP_CHUNK_CHARS):
+                skills.update(dict.fromkeys(matcher.find(chunk)))
+            return list(skills)
+
+    def analyze_jd(self, text):
+        """Analyze a JD; when it names taxonomy skills, a tokenizer-only pass replaces the full parse."""
+        if self.keyword_mode != "lemmas":
+            skills = self._find_skills(text)
+            if skills or self.keyword_mode == "skills":
+                return {"text": text, "name": None, "keywords": [], "skills": skills}
+        return self.analyze_cached(text)
+
+    def analyze_cached(self, text):
+        """analyze() backed by ANALYSIS_CACHE; a hit costs one hash of the text instead of a parse."""
+        cache_key = make_key("analysis", get_skill_matcher().fingerprint, text)
+        entry = ANALYSIS_CACHE.get(cache_key)
+        nlp = get_nlp()
+        if entry is not None:
+            if entry.get("doc") and nlp:
+                from spacy.tokens import DocBin
+                # Re-derive from the stored Doc so the cache survives changes to the derivation
+                doc = list(DocBin().from_bytes(entry["doc"]).get_docs(nlp.vocab))[0]
+                return self._analysis_from_doc(doc, text)
+            return {"text": text, **entry}
+
+        if len(text or "") > NLP_CHUNK_CHARS or self._over_budget():
+            # Chunked (or budget-limited) analysis has no single Doc to keep
+            analysis = self.analyze(text)
+            doc = None
+        else:
+            doc = self._parse(text)
+            analysis = self._analysis_from_doc(doc, text)
+        # A degraded result depends on this request's budget; don't pin it
+        if analysis.get("degraded"):
+            return analysis
+        entry = {"name": analysis["name"], "keywords": analysis["keywords"], "skills": analysis["skills"]}
+        if CACHE_DOCS and doc is not None:
+            from spacy.tokens import DocBin
+            entry["doc"] = DocBin(docs=[doc]).to_bytes()
+        ANALYSIS_CACHE.set(cache_key, entry)
+        return analysis
+
+    def analyze_many(self, texts, batch_size=DEFAULT_BATCH_SIZE, n_process=DEFAULT_N_PROCESS):
+        """Stream texts through nlp.pipe and yield one analysis per text, in input order.
+
+        Texts longer than NLP_CHUNK_CHARS go through analyze() (capped and chunked) instead.
+        The budget is checked between documents; once it runs out, every remaining text
+        gets the regex fallback and is marked "degraded", as in analyze().
+        n_process > 1 makes spaCy fork worker processes with the default start method;
+        use it from scripts, not from a multi-threaded web worker.
+        """
+        texts = [t or "" for t in texts]
+        nlp = get_nlp()
+        if not nlp:
+            for text in texts:
+                yield self.analyze(text)
+            return
+
+        docs = nlp.pipe((t for t in texts if len(t) <= NLP_CHUNK_CHARS), batch_size=batch_size, n_process=n_process)
+        degraded = False
+        for text in texts:
+            degraded = degraded or self._over_budget()
+            if degraded:
+                analysis = dict(self._analysis_from_doc(None, text[:NLP_MAX_CHARS]), degraded=True)
+                analysis["text"] = text
+                yield analysis
+            elif len(text) > NLP_CHUNK_CHARS:
+                yield self.analyze(text)
+            else:
+                yield self._analysis_from_doc(next(docs), text)
+
+    def _name_from_doc(self, doc, text):
+        """Use the first PERSON entity as the name, or the first line when spaCy is unavailable."""
+        if doc is not None:
+            for ent in doc.ents:
+                if ent.label_ == "PERSON":
+                    return ent.text
+            return None
+        if get_nlp() is None and text:
+            # Very basic fallback: just grab the first line of the resume
+            lines = [l.strip() for l in text.split('\n') if l.strip()]
+            if lines: return lines[0]
+        return None
+
+    def _keywords_from_doc(self, doc, text):
+        """Collect noun, proper noun and adjective lemmas (or regex words without spaCy)."""
+        if not text:
+            return []
+
+        keywords = []
+        if doc is not None:
+            for token in doc:
+                if not token.is_stop and not token.is_punct and not token.is_space:
+                    if token.pos_ in ['NOUN', 'PROPN', 'ADJ']:
+                        keywords.append(token.lemma_.lower())
+        else:
+            # Fallback regex extraction, de-duplicated as it goes so huge texts don't build a word list
+            return list(dict.fromkeys(
+                w for w in (m.group() for m in re.finditer(r'\b[a-z]{3,}\b', text.lower()))
+                if w not in BASIC_STOP_WORDS))
+
+        # Remove duplicates while preserving order
+        return list(dict.fromkeys(keywords))
+
+    def parse_resume_info(self, text, analysis=None):
         """Extract Basic Info like Email and Phone using regex, and Name using spaCy NER."""
         # Regex for Email
         email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', text)
@@ -32,61 +406,130 @@ class ATSScanner:
         phone_match = re.search(r'(\+?\d{1,3}[\s-]?)?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{4}', text)
         phone = phone_match.group(0) if phone_match else None
         
-        # Extract Name using spaCy Entities (PERSON) if available
-        name = None
-        if nlp:
-            doc = nlp(text)
-            for ent in doc.ents:
-                if ent.label_ == "PERSON":
-                    name = ent.text
-                    break
-        else:
-            # Very basic fallback: just grab the first line of the resume
-            lines = [l.strip() for l in text.split('\n') if l.strip()]
-            if lines: name = lines[0]
+        # Name comes from the shared parse when the caller already has one
+        if analysis is None:
+            analysis = self.analyze(text)
                 
         return {
-            "name": name,
+            "name": analysis["name"],
             "email": email,
             "phone": phone
         }
 
     def extract_keywords(self, text):
         """Extract nouns, proper nouns, and specific keywords to match against the JD."""
-        if not text:
-            return []
-            
-        keywords = []
-        if nlp:
-            doc = nlp(text.lower())
-            for token in doc:
-                if not token.is_stop and not token.is_punct and not token.is_space:
-                    if token.pos_ in ['NOUN', 'PROPN', 'ADJ']:
-                        keywords.append(token.lemma_)
-        else:
-            # Fallback regex extraction
-            words = re.findall(r'\b[a-z]{3,}\b', text.lower())
-            keywords = [w for w in words if w not in BASIC_STOP_WORDS]
-                    
-        # Remove duplicates while preserving order
-        return list(dict.fromkeys(keywords))
+        return self.analyze(text)["keywords"]
+
+    def scan(self, resume_text, jd_text):
+        """Run the full ATS scan, parsing the resume and the JD at most once each (cached across calls)."""
+        return self.build_report(self.analyze_cached(resume_text), self.analyze_jd(jd_text))
+
+    def scan_many(self, resumes, jd_text, batch_size=DEFAULT_BATCH_SIZE, n_process=DEFAULT_N_PROCESS):
+        """Scan many resumes against one JD and return reports ranked by total score.
+
+        The JD is parsed once; resumes are streamed through nlp.pipe. Keyword hits for all
+        resumes go into one matrix and calculate_scores scores them in one pass, giving the
+        same reports as build_report. Each report carries the "index" of its resume in the
+        input so callers can map it back.
+        """
+        jd = self.analyze_jd(jd_text)
+        source = self.keyword_source(jd)
+        jd_terms = sorted(set(jd[source]))
+        with metrics.timed("scan_many"):
+            analyses = list(self.analyze_many(resumes, batch_size=batch_size, n_process=n_process))
+            infos = [self.parse_resume_info(a["text"], a) for a in analyses]
+            with metrics.timed("sections"):
+                sections = [self.detect_sections(a["text"]) for a in analyses]
+            with metrics.timed("score"):
+                inputs = self.score_inputs(analyses, jd_terms, source, infos=infos, sections=sections)
+                scores = score_dicts(calculate_scores(*inputs))
+
+        keyword_matrix = inputs[0]
+        reports = []
+        for index, analysis in enumerate(analyses):
+            matched = [jd_terms[j] for j in keyword_matrix[index].nonzero()[0]]
+            report = {
+                "info": infos[index],
+                "sections": sections[index],
+                "keywords": {
+                    "matched": matched,
+                    "missing": [term for term, hit in zip(jd_terms, keyword_matrix[index]) if not hit],
+                    "extra": list(set(analysis[source]) - set(jd_terms)),
+                    "jd_provided": bool(jd_terms),
+                    "match_rate": (len(matched) / len(jd_terms)) if jd_terms else 1.0,
+                    "source": source
+                },
+                "score": scores[index],
+                "index": index
+            }
+            if analysis.get("degraded") or jd.get("degraded"):
+                report["degraded"] = True
+            reports.append(report)
+
+        reports.sort(key=lambda r: r["score"]["total_score"], reverse=True)
+        return reports
+
+    def keyword_source(self, jd):
+        """Which analysis field ("skills" or "keywords") to compare for this JD."""
+        if self.keyword_mode == "skills":
+            return "skills"
+        if self.keyword_mode == "lemmas":
+            return "keywords"
+        return "skills" if jd.get("skills") else "keywords"
+
+    def build_report(self, resume, jd):
+        """Assemble info, sections, keyword comparison and score from analyzed documents."""
+        info_dict = self.parse_resume_info(resume["text"], resume)
+        with metrics.timed("sections"):
+            sections_dict = self.detect_sections(resume["text"])
+        source = self.keyword_source(jd)
+        with metrics.timed("keyword_compare"):
+            keyword_analysis = self.compare_keywords(resume[source], jd[source])
+        keyword_analysis["source"] = source
+        with metrics.timed("score"):
+            ats_score = self.calculate_score(keyword_analysis, sections_dict, info_dict)
+
+        report = {
+            "info": info_dict,
+            "sections": sections_dict,
+            "keywords": keyword_analysis,
+            "score": ats_score
+        }
+        # Budget ran out: scored partly from the regex fallback
+        if resume.get("degraded") or jd.get("degraded"):
+            report["degraded"] = True
+        return report
+
+    def locate_sections(self, text):
+        """Find section headers in one pass and return their offsets, in document order.
+
+        Returns {section: {"header": (start, end), "span": (start, end)}} for the first
+        header of each section. "header" covers the header line; "span" runs from the
+        header line to the next detected header (or the end of the text).
+        """
+        names = list(self.sections_keywords)
+        headers = []
+        for match in self.section_pattern.finditer(text):
+            group = match.lastgroup
+            section = names[int(group[1:])]
+            if any(h[0] == section for h in headers):
+                continue
+            kw_start, kw_end = match.span(group)
+            line_start = text.rfind('\n', 0, kw_start) + 1
+            line_end = text.find('\n', kw_end)
+            headers.append((section, line_start, len(text) if line_end == -1 else line_end))
+
+        located = {}
+        for i, (section, start, end) in enumerate(headers):
+            span_end = headers[i + 1][1] if i + 1 < len(headers) else len(text)
+            located[section] = {"header": (start, end), "span": (start, span_end)}
+        return located
 
-    def detect_sections(self, text):
+    def detect_sections(self, text, located=None):
         """Determine which standard resume sections are present based on headers."""
-        text_lower = text.lower()
-        found_sections = {}
-        
-        for section, keywords in self.sections_keywords.items():
-            found = False
-            for kw in keywords:
-                # Look for the section title (might be preceded/followed by newlines or formatting)
-                if re.search(r'(?m)^[\s#\*\-]*' + re.escape(kw) + r'[\s:]*$', text_lower) or \
-                   f"\n{kw}\n" in f"\n{text_lower}\n":
-                    found = True
-                    break
-            found_sections[section] = "Found" if found else "Missing"
-            
-        return found_sections
+        if located is None:
+            located = self.locate_sections(text)
+        return {section: ("Found" if section in located else "Missing") for section in self.sections_keywords}
 
     def compare_keywords(self, resume_kws, jd_kws):
         """Compare resume keywords with JD keywords to find matches, missing, and extra."""
@@ -107,47 +550,122 @@ class ATSScanner:
             "match_rate": (len(matched) / len(jd_set)) if jd_provided else 1.0
         }
 
-    def calculate_score(self, keyword_data, sections_dict, info_dict):
-        """Calculate score out of 100 based on weights."""
+    def calculate_score(self, keyword_data, sections_dict, info_dict, weights=None):
+        """Calculate score out of 100 based on weights (SCORE_WEIGHTS unless given)."""
+        w = weights or SCORE_WEIGHTS
         score = 0
         
-        # 1. Keyword Match (40% Weight)
+        # 1. Keyword Match
         match_rate = keyword_data['match_rate']
         
         # If no JD was provided, assume keywords are perfectly fine so they aren't penalized
         if not keyword_data.get('jd_provided', True):
-            keyword_score = 40
+            keyword_score = w["keyword"]
         else:
-            keyword_score = min(40, round(match_rate * 40))
+            keyword_score = min(w["keyword"], round(match_rate * w["keyword"]))
             
         score += keyword_score
         
-        # 2. Section Completeness (30% Weight)
+        # 2. Section Completeness
         # Check standard sections
-        expected_sections = ["Experience", "Education", "Skills", "Projects"]
+        expected_sections = EXPECTED_SECTIONS
         found_count = sum(1 for sec in expected_sections if sections_dict.get(sec) == "Found")
-        section_score = round((found_count / len(expected_sections)) * 30)
+        section_score = round((found_count / len(expected_sections)) * w["section"])
         score += section_score
         
-        # 3. Contact Info Presence (15% Weight)
+        # 3. Contact Info Presence (half for email, half for phone)
         contact_score = 0
-        if info_dict.get('email'): contact_score += 7.5
-        if info_dict.get('phone'): contact_score += 7.5
+        if info_dict.get('email'): contact_score += w["contact"] / 2
+        if info_dict.get('phone'): contact_score += w["contact"] / 2
         score += contact_score
         
-        # 4. Formatting Quality Proxy (15% Weight)
+        # 4. Formatting Quality Proxy
         # We proxy formatting quality by checking text length and extraction success
-        format_score = 15
+        format_score = w["format"]
         if not info_dict.get('email') and not info_dict.get('name'):
-            format_score -= 10 # Likely poor formatting if it can't find basic info
+            format_score -= w["format_penalty"] # Likely poor formatting if it can't find basic info
         score += format_score
         
         return {
             "total_score": int(score),
             "breakdown": {
-                "keyword_score": int(keyword_score), # out of 40
-                "section_score": int(section_score), # out of 30
-                "contact_score": int(contact_score), # out of 15
-                "format_score": int(format_score)    # out of 15
+                "keyword_score": int(keyword_score), # out of w["keyword"]
+                "section_score": int(section_score), # out of w["section"]
+                "contact_score": int(contact_score), # out of w["contact"]
+                "format_score": int(format_score)    # out of w["format"]
             }
         }
+
+    def score_inputs(self, resume_analyses, jd_kws, source="skills", infos=None, sections=None):
+        """NumPy inputs for calculate_scores from analyses (as returned by analyze_cached plus "text").
+
+        Returns (keyword_matrix, section_flags, has_email, has_phone, has_name), where
+        keyword_matrix[i, j] says whether resume i contains the j-th JD keyword (sorted).
+        infos/sections are per-resume parse_resume_info/detect_sections results, if already known.
+        """
+        import numpy as np
+
+        jd_terms = sorted(set(jd_kws))
+        column = {term: j for j, term in enumerate(jd_terms)}
+        n = len(resume_analyses)
+        keyword_matrix = np.zeros((n, len(jd_terms)), dtype=bool)
+        section_flags = np.zeros((n, len(EXPECTED_SECTIONS)), dtype=bool)
+        has_email = np.zeros(n, dtype=bool)
+        has_phone = np.zeros(n, dtype=bool)
+        has_name = np.zeros(n, dtype=bool)
+        for i, analysis in enumerate(resume_analyses):
+            hits = [column[term] for term in set(analysis[source]) if term in column]
+            keyword_matrix[i, hits] = True
+            found = sections[i] if sections is not None else self.detect_sections(analysis["text"])
+            section_flags[i] = [found.get(section) == "Found" for section in EXPECTED_SECTIONS]
+            info = infos[i] if infos is not None else self.parse_resume_info(analysis["text"], analysis)
+            has_email[i] = bool(info["email"])
+            has_phone[i] = bool(info["phone"])
+            has_name[i] = bool(info["name"])
+        return keyword_matrix, section_flags, has_email, has_phone, has_name
+
+def calculate_scores(keyword_matrix, section_flags, has_email, has_phone, has_name, weights=None):
+    """Vectorized calculate_score for N resumes against one JD.
+
+    keyword_matrix is (N, M) bool: resume i contains JD keyword j (M == 0 means no JD).
+    section_flags is (N, len(EXPECTED_SECTIONS)) bool; the rest are (N,) bools.
+    Returns {"total_score": (N,), "keyword_score": ..., "section_score": ..., "contact_score": ...,
+    "format_score": ...} as int arrays, identical to calculate_score resume by resume:
+    np.round rounds half to even like round(), and totals truncate like int().
+    """
+    import numpy as np
+
+    w = weights or SCORE_WEIGHTS
+    keyword_matrix = np.asarray(keyword_matrix, dtype=bool)
+    n, m = keyword_matrix.shape
+    if m == 0:
+        keyword_score = np.full(n, float(w["keyword"]))
+    else:
+        match_rate = keyword_matrix.sum(axis=1) / m
+        keyword_score = np.minimum(w["keyword"], np.round(match_rate * w["keyword"]))
+
+    section_flags = np.asarray(section_flags, dtype=bool)
+    section_score = np.round((section_flags.sum(axis=1) / section_flags.shape[1]) * w["section"])
+
+    has_email = np.asarray(has_email, dtype=bool)
+    has_phone = np.asarray(has_phone, dtype=bool)
+    contact_score = has_email * (w["contact"] / 2) + has_phone * (w["contact"] / 2)
+    format_score = np.where(~has_email & ~np.asarray(has_name, dtype=bool),
+                            w["format"] - w["format_penalty"], w["format"])
+
+    total = keyword_score + section_score + contact_score + format_score
+    return {
+        "total_score": total.astype(int),
+        "keyword_score": keyword_score.astype(int),
+        "section_score": section_score.astype(int),
+        "contact_score": contact_score.astype(int),
+        "format_score": format_score.astype(int)
+    }
+
+def score_dicts(scores):
+    """calculate_scores output as a list of calculate_score-shaped dicts."""
+    parts = ["keyword_score", "section_score", "contact_score", "format_score"]
+    return [
+        {"total_score": int(total), "breakdown": {part: int(scores[part][i]) for part in parts}}
+        for i, total in enumerate(scores["total_score"])
+    ]
@@ -0,0 +1,82 @@
+"""Compare prompt/output tokens and latency of the full vs. hybrid /analyze_ats AI call.
+
+Usage: python benchmarks/bench_ai_hybrid.py [--resumes 10] [--latency 0.3] [--ms-per-token 8] [--live]
+By default Gemini is the local stand-in from fake_gemini.py, whose latency grows with output
+size (--ms-per-token). --live sends the same prompts to the real API configured in .env
+(GEMINI_API_KEY / GEMINI_URL); token counts then come from Gemini's usageMetadata.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_jd, make_resume
+from fake_gemini import start_fake_gemini
+
+
+def run_mode(cases, hybrid):
+    import ai_helpers
+    from app import local_findings
+
+    ai_helpers.AI_CACHE.clear()
+    before = dict(ai_helpers.gemini.stats)
+    latencies = []
+    for resume, jd_text, report in cases:
+        local = local_findings(resume, report) if hybrid else None
+        start = time.perf_counter()
+        result = ai_helpers.analyze_with_ai_ats(resume["text"], jd_text, local=local)
+        latencies.append(time.perf_counter() - start)
+        if "error" in result:
+            print(f"  AI call failed: {result['error'][:120]}")
+    stats = ai_helpers.gemini.stats
+    calls = max(1, stats["requests"] - before["requests"])
+    return {
+        "prompt": (stats["prompt_tokens"] - before["prompt_tokens"]) / calls,
+        "output": (stats["output_tokens"] - before["output_tokens"]) / calls,
+        "p50": statistics.median(latencies),
+        "mean": statistics.mean(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake Gemini base latency in seconds")
+    parser.add_argument("--ms-per-token", type=float, default=8.0, help="fake Gemini generation speed")
+    parser.add_argument("--live", action="store_true", help="call the real Gemini API instead of the stand-in")
+    args = parser.parse_args()
+
+    if not args.live:
+        server, url = start_fake_gemini(args.latency, ms_per_token=args.ms_per_token)
+        os.environ["GEMINI_URL"] = url
+        os.environ["GEMINI_API_KEY"] = "fake"
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+    from ats_engine import ATSScanner
+
+    scanner = ATSScanner()
+    cases = []
+    for i in range(args.resumes):
+        text, jd_text = make_resume(i), make_jd(i % 3)
+        resume = scanner.analyze_cached(text)
+        cases.append((resume, jd_text, scanner.build_report(resume, scanner.analyze_jd(jd_text))))
+
+    full = run_mode(cases, hybrid=False)
+    hybrid = run_mode(cases, hybrid=True)
+
+    print(f"{args.resumes} resumes, {'live Gemini' if args.live else 'fake Gemini'}")
+    print(f"{'mode':<8}{'prompt tok':>12}{'output tok':>12}{'p50 ms':>10}{'mean ms':>10}")
+    for name, row in (("full", full), ("hybrid", hybrid)):
+        print(f"{name:<8}{row['prompt']:>12.0f}{row['output']:>12.0f}{row['p50'] * 1000:>10.0f}{row['mean'] * 1000:>10.0f}")
+
+    def change(key):
+        return 100 * (hybrid[key] / full[key] - 1) if full[key] else 0.0
+    print(f"hybrid vs full: output tokens {change('output'):+.0f}%, prompt tokens {change('prompt'):+.0f}%, "
+          f"mean latency {change('mean'):+.0f}%")
+
+
+if __name__ == "__main__":
+    main()
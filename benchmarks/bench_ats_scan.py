@@ -0,0 +1,80 @@
+"""Compare the legacy three-parse ATS flow with the single-pass ATSScanner.scan.
+
+Usage: python benchmarks/bench_ats_scan.py [--requests 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spacy
+
+import ats_engine
+from ats_engine import ATSScanner
+from corpus import make_jd, make_resume
+
+
+def legacy_scan(full_nlp, scanner, text, jd_text):
+    """The pre-scan() request flow: full pipeline, one parse for the name and one per keyword list."""
+    doc = full_nlp(text)
+    name = next((ent.text for ent in doc.ents if ent.label_ == "PERSON"), None)
+    info = scanner.parse_resume_info(text, {"name": name})
+
+    def keywords(t):
+        if not t:
+            return []
+        return list(dict.fromkeys(
+            tok.lemma_ for tok in full_nlp(t.lower())
+            if not tok.is_stop and not tok.is_punct and not tok.is_space and tok.pos_ in ['NOUN', 'PROPN', 'ADJ']
+        ))
+
+    sections = scanner.detect_sections(text)
+    kw = scanner.compare_keywords(keywords(text), keywords(jd_text))
+    return scanner.calculate_score(kw, sections, info)
+
+
+def timed(fn, pairs):
+    samples = []
+    for text, jd_text in pairs:
+        start = time.perf_counter()
+        fn(text, jd_text)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(samples):8.2f} ms   p50 {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    if ats_engine.get_nlp() is None:
+        sys.exit("en_core_web_sm is not installed; run `python -m spacy download en_core_web_sm` first.")
+
+    full_nlp = spacy.load("en_core_web_sm")
+    scanner = ATSScanner()
+    pairs = [(make_resume(i), make_jd(i)) for i in range(args.requests)]
+
+    # Warm both pipelines so model loading is not counted
+    legacy_scan(full_nlp, scanner, *pairs[0])
+    scanner.scan(*pairs[0])
+
+    before = timed(lambda t, jd: legacy_scan(full_nlp, scanner, t, jd), pairs)
+    after = timed(scanner.scan, pairs)
+
+    print(f"{args.requests} requests, pipeline {ats_engine.get_nlp().pipe_names}")
+    report("before (3 parses)", before)
+    report("after (scan)", after)
+    print(f"speedup {statistics.mean(before) / statistics.mean(after):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
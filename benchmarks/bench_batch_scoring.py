@@ -0,0 +1,96 @@
+"""Check calculate_scores against calculate_score and time both at 10k resumes.
+
+Usage: python benchmarks/bench_batch_scoring.py [--resumes 10000] [--real 200]
+Exits non-zero if any vectorized score differs from the scalar one. Random inputs cover
+round-half-even keyword rates, missing JDs and custom weights; --real more resumes from the
+corpus go through score_inputs and scan_many and are compared with ATSScanner.scan.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ats_engine import ATSScanner, EXPECTED_SECTIONS, SCORE_WEIGHTS, calculate_scores, score_dicts
+from corpus import make_jd, make_resume
+
+CUSTOM_WEIGHTS = {"keyword": 37.5, "section": 33, "contact": 12.2, "format": 17.3, "format_penalty": 6.1}
+
+
+def random_inputs(rng, n, m):
+    keyword_matrix = rng.random((n, m)) < rng.random((n, 1))
+    section_flags = rng.random((n, len(EXPECTED_SECTIONS))) < 0.7
+    has_email, has_phone, has_name = (rng.random((3, n)) < 0.6)
+    return keyword_matrix, section_flags, has_email, has_phone, has_name
+
+
+def scalar_scores(scanner, keyword_matrix, section_flags, has_email, has_phone, has_name, weights):
+    jd_kws = [f"kw{j}" for j in range(keyword_matrix.shape[1])]
+    scores = []
+    for i in range(len(keyword_matrix)):
+        resume_kws = [kw for kw, hit in zip(jd_kws, keyword_matrix[i]) if hit]
+        keyword_data = scanner.compare_keywords(resume_kws, jd_kws)
+        sections = {name: ("Found" if found else "Missing") for name, found in zip(EXPECTED_SECTIONS, section_flags[i])}
+        info = {"email": "a@b.co" if has_email[i] else None, "phone": "555" if has_phone[i] else None,
+                "name": "A" if has_name[i] else None}
+        scores.append(scanner.calculate_score(keyword_data, sections, info, weights=weights))
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=10000)
+    parser.add_argument("--real", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scanner = ATSScanner()
+    mismatches = 0
+
+    for weights in (SCORE_WEIGHTS, CUSTOM_WEIGHTS):
+        for m in (0, 1, 8, 20, 80):
+            inputs = random_inputs(rng, 2000, m)
+            expected = scalar_scores(scanner, *inputs, weights)
+            got = score_dicts(calculate_scores(*inputs, weights=weights))
+            bad = sum(a != b for a, b in zip(expected, got))
+            mismatches += bad
+            print(f"random  m={m:<3} weights={'default' if weights is SCORE_WEIGHTS else 'custom '}  mismatches: {bad}")
+
+    resumes = [make_resume(i) for i in range(args.real)]
+    jd = make_jd(7)
+    jd_analysis = scanner.analyze_jd(jd)
+    source = scanner.keyword_source(jd_analysis)
+    analyses = [dict(scanner.analyze_cached(text), text=text) for text in resumes]
+    got = score_dicts(calculate_scores(*scanner.score_inputs(analyses, jd_analysis[source], source)))
+    bad = sum(scanner.scan(text, jd)["score"] != score for text, score in zip(resumes, got))
+    mismatches += bad
+    print(f"corpus  {args.real} resumes vs ATSScanner.scan  mismatches: {bad}")
+
+    bad = 0
+    for report in scanner.scan_many(resumes, jd):
+        expected = scanner.scan(resumes[report.pop("index")], jd)
+        for r in (report, expected):
+            for field in ("matched", "missing", "extra"):
+                r["keywords"][field] = sorted(r["keywords"][field])
+        bad += report != expected
+    mismatches += bad
+    print(f"scan_many  {args.real} reports vs ATSScanner.scan  mismatches: {bad}")
+
+    inputs = random_inputs(rng, args.resumes, 20)
+    start = time.perf_counter()
+    scalar_scores(scanner, *inputs, SCORE_WEIGHTS)
+    scalar = time.perf_counter() - start
+    start = time.perf_counter()
+    calculate_scores(*inputs)
+    vectorized = time.perf_counter() - start
+    print(f"{args.resumes} resumes x 20 JD keywords: scalar {scalar * 1000:.1f} ms, "
+          f"vectorized {vectorized * 1000:.2f} ms ({scalar / vectorized:.0f}x)")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Drive the main endpoints concurrently against a local Gemini stand-in and report latency percentiles.
+
+Usage: python benchmarks/bench_endpoints.py [--requests 40] [--concurrency 8] [--latency 1.0] [--jitter 0.3]
+                                            [--error-rate 0.05] [--distinct 20] [--pdf-pages 2]
+Everything runs offline: the app talks to benchmarks/fake_gemini.py through GEMINI_URL, uses a
+throwaway SQLite database and jobs database. --distinct controls how many different
+resumes are cycled through, i.e. how often the extraction/analysis/AI caches can hit.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_docx, make_jd, make_pdf
+from fake_gemini import start_fake_gemini
+
+ENDPOINTS = ["analyze", "analyze_ats", "improve_sentence", "improve_sentences", "download_report"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_requests(args):
+    """One (endpoint, kwargs-factory) list per endpoint, cycling through --distinct documents."""
+    files = []
+    for i in range(args.distinct):
+        if i % 2:
+            files.append((make_docx(i), f"resume_{i}.docx"))
+        else:
+            files.append((make_pdf(args.pdf_pages, seed=i), f"resume_{i}.pdf"))
+    jds = [make_jd(i) for i in range(max(1, args.distinct // 4))]
+    report = {
+        "score": {"total_score": 72, "breakdown": {"keyword_score": 30, "section_score": 20,
+                                                   "contact_score": 15, "format_score": 7}},
+        "keywords": {"matched": ["python", "flask", "docker"], "missing": ["kubernetes"], "extra": []}
+    }
+
+    def upload(i):
+        data, name = files[i % len(files)]
+        return (BytesIO(data), name)
+
+    return {
+        "analyze": lambda i: dict(path="/analyze", data={"resume": upload(i)},
+                                  content_type="multipart/form-data"),
+        "analyze_ats": lambda i: dict(path="/analyze_ats",
+                                      data={"resume": upload(i), "job_description": jds[i % len(jds)]},
+                                      content_type="multipart/form-data"),
+        "improve_sentence": lambda i: dict(path="/improve_sentence",
+                                           json={"sentence": f"Worked on project number {i % args.distinct}."}),
+        "improve_sentences": lambda i: dict(path="/improve_sentences",
+                                            json={"sentences": [f"Handled task {i}-{n}." for n in range(15)]}),
+        "download_report": lambda i: dict(path="/download_report", json=report),
+    }
+
+
+def run_endpoint(app, name, make_request, args):
+    """Fire --requests calls from --concurrency logged-in clients; returns (latencies, failures, wall)."""
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def worker():
+        client = app.test_client()
+        client.post("/login", json={"email": "bench@example.com", "password": "benchmark"})
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            kwargs = make_request(i)
+            start = time.perf_counter()
+            response = client.post(kwargs.pop("path"), **kwargs)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=1.0, help="mean fake Gemini latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="standard deviation of that latency")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of Gemini calls answered 503")
+    parser.add_argument("--distinct", type=int, default=20, help="number of different resumes to cycle")
+    parser.add_argument("--pdf-pages", type=int, default=2)
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS, choices=ENDPOINTS)
+    args = parser.parse_args()
+
+    server, url = start_fake_gemini(args.latency, args.jitter, args.error_rate)
+    workdir = tempfile.mkdtemp(prefix="smartjob_bench_")
+    os.environ["GEMINI_URL"] = url
+    os.environ["GEMINI_API_KEY"] = "fake"
+    os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(workdir, "bench.db"))
+    os.environ.setdefault("JOBS_DB", os.path.join(workdir, "jobs.db"))
+
+    from werkzeug.security import generate_password_hash
+    from app import app, db, User
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(name="Bench", email="bench@example.com",
+                            password_hash=generate_password_hash("benchmark")))
+        db.session.commit()
+
+    requests = build_requests(args)
+    print(f"fake Gemini: latency {args.latency}s +/- {args.jitter}s, {args.error_rate:.0%} 503s; "
+          f"{args.requests} requests/endpoint at concurrency {args.concurrency}, {args.distinct} distinct resumes")
+    print(f"{'endpoint':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>9}{'errors':>8}")
+    for name in args.endpoints:
+        latencies, failures, wall = run_endpoint(app, name, requests[name], args)
+        print(f"{name:<18}{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 95) * 1000:>10.1f}"
+              f"{percentile(latencies, 99) * 1000:>10.1f}{len(latencies) / wall:>9.2f}{len(failures):>8}")
+
+    stats = server.RequestHandlerClass.stats
+    from ai_helpers import sentence_coalescer
+    print(f"sentence coalescer: {sentence_coalescer.stats['items']} sentences in {sentence_coalescer.stats['batches']} batches")
+    print(f"fake Gemini served {stats['requests']} calls ({stats['errors']} injected 503s)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time JDIndex build/query against a linear scan over the same job descriptions.
+
+Usage: python benchmarks/bench_jd_index.py [--jds 5000] [--queries 50] [--k 10]
+The linear baseline runs ATSScanner.scan (cached JD analyses, set ops, calculate_score) per JD.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ats_engine import ATSScanner
+from corpus import make_jd, make_resume
+from jd_index import JDIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jds", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--linear-sample", type=int, default=500, help="JDs scanned to estimate the linear cost")
+    args = parser.parse_args()
+
+    jds = [make_jd(i, requirements=8 + i % 8) for i in range(args.jds)]
+    index = JDIndex()
+    start = time.perf_counter()
+    for i, text in enumerate(jds):
+        index.add(i, text)
+    print(f"indexed {args.jds} JDs in {time.perf_counter() - start:.2f}s (one-off, includes NLP extraction)")
+
+    resumes = [make_resume(1000 + i) for i in range(args.queries)]
+    start = time.perf_counter()
+    index.query(resumes[0], k=args.k)
+    print(f"first query (compiles postings/IDF): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    latencies = []
+    for text in resumes:
+        start = time.perf_counter()
+        index.query(text, k=args.k)
+        latencies.append(time.perf_counter() - start)
+    print(f"index query top-{args.k}: median {statistics.median(latencies) * 1000:.2f} ms, "
+          f"max {max(latencies) * 1000:.2f} ms over {args.queries} resumes")
+
+    index.remove(0)
+    index.add(0, jds[0])
+    start = time.perf_counter()
+    index.query(resumes[0], k=args.k)
+    print(f"query after add/remove (recompile): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    scanner = ATSScanner()
+    sample = jds[:min(args.linear_sample, args.jds)]
+    for text in sample:
+        scanner.scan(resumes[0], text)  # warm the JD analysis cache, as an index would
+    start = time.perf_counter()
+    for text in sample:
+        scanner.scan(resumes[1], text)
+    per_jd = (time.perf_counter() - start) / len(sample)
+    print(f"linear scan: {per_jd * 1000:.3f} ms per JD -> ~{per_jd * args.jds * 1000:.0f} ms for {args.jds} JDs")
+
+
+if __name__ == "__main__":
+    main()
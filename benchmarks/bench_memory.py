@@ -0,0 +1,184 @@
+"""Peak-RSS check for /analyze_ats on adversarial ~16 MB uploads.
+
+Usage: python benchmarks/bench_memory.py [--max-peak-mb 256] [--unbounded] [--cases docx_bomb docx_large pdf_pages jd_one_line]
+Each case runs in a fresh child process (Flask test client, fake Gemini) while a thread samples
+/proc/self/statm; the reported peak is growth over the warmed-up baseline. Exits non-zero if a
+case grows RSS by more than --max-peak-mb. --unbounded lifts the text/NLP/DOCX caps to show
+what the same inputs cost without them.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SKILLS, make_docx, make_jd, make_pdf, make_resume
+
+UPLOAD_BYTES = 15 * 1024 * 1024
+CASES = ["docx_bomb", "docx_large", "pdf_pages", "jd_one_line"]
+UNBOUNDED_ENV = {"ATS_MAX_TEXT_CHARS": str(10 ** 10), "ATS_NLP_MAX_CHARS": str(10 ** 10),
+                 "ATS_NLP_CHUNK_CHARS": str(10 ** 10), "DOCX_MAX_XML_BYTES": str(10 ** 12),
+                 "ATS_TIME_BUDGET": "0", "ATS_MAX_RSS_MB": "0"}
+
+
+def docx_with_body(path, paragraphs):
+    """Write a DOCX whose document.xml streams the given paragraph texts (never held in memory at once)."""
+    template = zipfile.ZipFile(BytesIO(make_docx(0)))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as out:
+        for item in template.infolist():
+            if item.filename != "word/document.xml":
+                out.writestr(item, template.read(item))
+        with out.open("word/document.xml", "w", force_zip64=True) as xml:
+            xml.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                      b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+            for text in paragraphs:
+                xml.write(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>".encode())
+            xml.write(b"</w:body></w:document>")
+
+
+def build_case(case, workdir):
+    """Return (filename, path, jd_text) for a case, generating files under workdir."""
+    jd = make_jd(0)
+    if case == "docx_bomb":
+        # Highly compressible: a few MB on the wire, hundreds of MB of XML once inflated
+        path = os.path.join(workdir, "bomb.docx")
+        line = make_resume(1).replace("\n", " ")[:200]
+        docx_with_body(path, (line for _ in range(1_500_000)))
+        return "bomb.docx", path, jd
+    if case == "docx_large":
+        # Random skill words compress poorly: close to the upload limit on the wire
+        path = os.path.join(workdir, "large.docx")
+        rng = random.Random(0)
+        words = SKILLS + [f"w{n}x{n * 7919 % 100003}" for n in range(20000)]
+
+        def paragraphs():
+            while os.path.getsize(path) < UPLOAD_BYTES - 1024 * 1024:
+                for _ in range(2000):
+                    yield " ".join(rng.choice(words) for _ in range(20))
+        open(path, "wb").close()
+        docx_with_body(path, paragraphs())
+        return "large.docx", path, jd
+    if case == "pdf_pages":
+        path = os.path.join(workdir, "pages.pdf")
+        pages = 40
+        data = make_pdf(pages)
+        pages = max(1, int(pages * UPLOAD_BYTES / len(data)))
+        with open(path, "wb") as f:
+            f.write(make_pdf(pages))
+        return "pages.pdf", path, jd
+    if case == "jd_one_line":
+        # Just under the form-field limit, with no newlines to split on
+        path = os.path.join(workdir, "resume.docx")
+        with open(path, "wb") as f:
+            f.write(make_docx(2))
+        rng = random.Random(1)
+        jd_text = " ".join(rng.choice(SKILLS + ["responsible", "for", "building", "systems"]) for _ in range(60000))
+        return "resume.docx", path, jd_text[:480000]
+    raise ValueError(case)
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def child(case_file):
+    """Run one upload through /analyze_ats and print a JSON line with the measurements."""
+    with open(case_file) as f:
+        filename, path, jd_text = json.load(f)
+
+    from fake_gemini import start_fake_gemini
+    _, url = start_fake_gemini()
+    os.environ["GEMINI_URL"] = url
+    os.environ["GEMINI_API_KEY"] = "fake"
+    os.environ["DATABASE_URL"] = "sqlite://"
+    os.environ["JOBS_DB"] = os.path.join(os.path.dirname(case_file), f"jobs_{os.getpid()}.db")
+
+    from werkzeug.security import generate_password_hash
+    from app import app, db, User
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(email="mem@example.com", password_hash=generate_password_hash("benchmark")))
+        db.session.commit()
+    client = app.test_client()
+    client.post("/login", json={"email": "mem@example.com", "password": "benchmark"})
+    # Warm up models and caches so the baseline includes them
+    client.post("/analyze_ats", data={"resume": (BytesIO(make_docx(3)), "warm.docx"), "job_description": make_jd(1)},
+                content_type="multipart/form-data")
+
+    with open(path, "rb") as f:
+        data = f.read()
+    baseline = rss_mb()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], rss_mb())
+            time.sleep(0.005)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    response = client.post("/analyze_ats", data={"resume": (BytesIO(data), filename), "job_description": jd_text},
+                           content_type="multipart/form-data")
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    body = response.get_json(silent=True) or {}
+    print(json.dumps({"status": response.status_code, "degraded": bool(body.get("degraded")),
+                      "upload_mb": len(data) / 1024 / 1024, "peak_mb": peak[0] - baseline, "seconds": elapsed,
+                      "error": body.get("error")}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", default=CASES, choices=CASES)
+    parser.add_argument("--max-peak-mb", type=float, default=256)
+    parser.add_argument("--unbounded", action="store_true", help="disable the caps (baseline for comparison)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    env = dict(os.environ, **(UNBOUNDED_ENV if args.unbounded else {}))
+    workdir = tempfile.mkdtemp(prefix="smartjob_mem_")
+    failures = 0
+    print(f"{'case':<14}{'upload MB':>10}{'status':>8}{'peak +MB':>10}{'seconds':>9}  notes")
+    for case in args.cases:
+        case_file = os.path.join(workdir, f"{case}.json")
+        with open(case_file, "w") as f:
+            json.dump(build_case(case, workdir), f)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", case_file],
+                              env=env, capture_output=True, text=True)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            failures += 1
+            print(f"{case:<14}  child failed (exit {proc.returncode}): {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = json.loads(lines[-1])
+        notes = "degraded" if result["degraded"] else ""
+        if result["error"]:
+            notes = f"{notes} {result['error'][:60]}".strip()
+        if result["peak_mb"] > args.max_peak_mb:
+            failures += 1
+            notes = f"OVER {args.max_peak_mb:.0f} MB {notes}"
+        print(f"{case:<14}{result['upload_mb']:>10.1f}{result['status']:>8}{result['peak_mb']:>10.1f}"
+              f"{result['seconds']:>9.2f}  {notes}")
+
+    sys.exit(1 if failures and not args.unbounded else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Time serial vs. process-pool PDF extraction on generated PDFs of 1-200 pages.
+
+Usage: python benchmarks/bench_pdf_extract.py [--pages 1 5 10 25 50 100 200] [--repeat 3]
+The first page count where the parallel path wins is the PDF_PARALLEL_MIN_PAGES crossover.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai_helpers
+from ai_helpers import extract_text_from_pdf
+from corpus import make_pdf
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Start the pool up front so worker spawn time is not billed to the first PDF
+    extract_text_from_pdf(make_pdf(4), parallel=True)
+
+    print(f"workers={ai_helpers.PDF_PARALLEL_WORKERS} threshold={ai_helpers.PDF_PARALLEL_MIN_PAGES} pages")
+    print(f"{'pages':>6} {'serial ms':>10} {'parallel ms':>12} {'speedup':>8}")
+    wins = []
+    for pages in args.pages:
+        data = make_pdf(pages)
+        serial = best_of(lambda: extract_text_from_pdf(data, parallel=False), args.repeat)
+        parallel = best_of(lambda: extract_text_from_pdf(data, parallel=True), args.repeat)
+        wins.append((pages, parallel < serial))
+        print(f"{pages:>6} {serial:>10.1f} {parallel:>12.1f} {serial / parallel:>7.2f}x")
+
+    # Crossover: the smallest size from which parallel wins at every larger size too
+    crossover = None
+    for pages, won in reversed(wins):
+        if not won:
+            break
+        crossover = pages
+    print(f"parallel wins from {crossover} pages up" if crossover else "parallel does not win consistently on this machine")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Synthetic resumes and job descriptions for the benchmark scripts."""
+import random
+from io import BytesIO
+
+FIRST_NAMES = ["Priya", "Daniel", "Aisha", "Marco", "Lena", "Kenji", "Sofia", "Omar", "Hannah", "Ravi"]
+LAST_NAMES = ["Sharma", "Okafor", "Nguyen", "Rossi", "Schmidt", "Tanaka", "Garcia", "Haddad", "Miller", "Kumar"]
+
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "SQL", "Go", "C++", "React", "Angular", "Flask",
+    "Django", "Spring Boot", "Node.js", "TensorFlow", "PyTorch", "scikit-learn", "Pandas", "NumPy",
+    "Docker", "Kubernetes", "Terraform", "Jenkins", "Git", "Linux", "AWS", "Azure", "Google Cloud",
+    "PostgreSQL", "MongoDB", "Redis", "Kafka", "Spark", "Airflow", "machine learning", "data analysis",
+    "REST APIs", "microservices", "CI/CD", "unit testing", "agile", "communication", "leadership",
+    "problem solving", "teamwork", "mentoring", "stakeholder management"
+]
+
+VERBS = ["Designed", "Built", "Led", "Optimized", "Migrated", "Automated", "Implemented", "Delivered",
+         "Maintained", "Refactored", "Scaled", "Launched"]
+OBJECTS = ["a payments platform", "the customer analytics pipeline", "an internal reporting dashboard",
+           "a recommendation service", "the deployment workflow", "a fraud detection model",
+           "the search backend", "a mobile onboarding flow", "the data warehouse", "an inventory system"]
+OUTCOMES = ["reducing latency by 40%", "saving 12 engineer-hours per week", "serving 2M daily users",
+            "cutting cloud spend by 25%", "improving conversion by 8%", "with zero downtime",
+            "raising test coverage to 90%", "across three regions"]
+
+
+def _bullet(rng):
+    skills = ", ".join(rng.sample(SKILLS, 2))
+    return f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {skills}, {rng.choice(OUTCOMES)}."
+
+
+def make_resume(seed=0, jobs=3, bullets_per_job=5):
+    """Return plain resume text with the usual headers, contact line and bullet points."""
+    rng = random.Random(seed)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}@example.com | +1 415 555 {rng.randint(1000, 9999)} | linkedin.com/in/{first.lower()}{last.lower()}",
+        "",
+        "Summary",
+        f"Software engineer with {rng.randint(2, 12)} years of experience building reliable products.",
+        "",
+        "Skills",
+        ", ".join(rng.sample(SKILLS, 12)),
+        "",
+        "Experience",
+    ]
+    for j in range(jobs):
+        lines.append(f"Senior Engineer, Company {rng.randint(1, 99)} ({2015 + j} - {2016 + j})")
+        lines.extend(_bullet(rng) for _ in range(bullets_per_job))
+        lines.append("")
+    lines += [
+        "Projects",
+        _bullet(rng),
+        _bullet(rng),
+        "",
+        "Education",
+        "B.Sc. Computer Science, State University",
+        "",
+        "Certifications",
+        "AWS Certified Solutions Architect",
+    ]
+    return "\n".join(lines)
+
+
+def make_jd(seed=0, requirements=10):
+    """Return a job description with responsibilities and a requirements list."""
+    rng = random.Random(10_000 + seed)
+    lines = [
+        "We are hiring a Senior Software Engineer to join our platform team.",
+        "",
+        "Responsibilities",
+    ]
+    lines.extend(_bullet(rng) for _ in range(requirements // 2))
+    lines += ["", "Requirements"]
+    lines.extend(f"- Strong experience with {s}." for s in rng.sample(SKILLS, requirements))
+    lines += ["", "We offer competitive salary, remote work and a learning budget."]
+    return "\n".join(lines)
+
+
+def make_pdf(pages=1, seed=0):
+    """Render `pages` pages of dense resume text into PDF bytes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(pages):
+        y = 760
+        p.setFont("Helvetica", 9)
+        for line in (make_resume(seed + page, jobs=4, bullets_per_job=8) + "\n").split("\n"):
+            if y < 40:
+                break
+            p.drawString(40, y, line[:110])
+            y -= 11
+        p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def make_docx(seed=0):
+    """Return a one-paragraph-per-line DOCX resume as bytes."""
+    import docx
+
+    document = docx.Document()
+    for line in make_resume(seed).split("\n"):
+        document.add_paragraph(line)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,121 @@
+"""A local stand-in for the Gemini generateContent endpoint, for offline benchmarks.
+
+Run standalone:  python benchmarks/fake_gemini.py --port 8089 --latency 1.5 --jitter 0.5 --error-rate 0.05
+then start the app with GEMINI_URL=http://127.0.0.1:8089/generate GEMINI_API_KEY=fake.
+
+Latency is sampled per request from a normal distribution (mean --latency, sd --jitter,
+floored at 0), plus --ms-per-token for each generated token (about 4 characters) so that
+longer outputs take longer; --error-rate of requests get a 503 with a Retry-After header.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANALYSIS_RESPONSE = {
+    "technical_skills": {
+        "Languages": ["Python", "SQL"],
+        "Frameworks_and_Libraries": ["Flask", "React"],
+        "Tools_and_Platforms": ["Docker", "Git"],
+        "Databases_and_Cloud": ["PostgreSQL", "AWS"]
+    },
+    "soft_skills": ["communication", "leadership"],
+    "job_roles": [{"title": "Backend Engineer", "description": "Builds APIs and services."}],
+    "ats_score": 72,
+    "ats_tips": ["Quantify impact in each bullet.", "Add a skills summary.", "Mirror the JD's wording."],
+    "missing_skills": [{"skill": "Kubernetes", "recommendation": "Deploy a side project on a managed cluster."}]
+}
+
+
+def fake_reply(prompt):
+    """Return plausible model text for the app's prompt types."""
+    if "Return ONLY the improved sentence" in prompt:
+        return "Led the redesign of a core service, cutting latency by 40%."
+    match = re.search(r"Return ONLY a JSON array of exactly (\d+) strings", prompt)
+    if match:
+        return json.dumps([f"Improved sentence {i + 1}." for i in range(int(match.group(1)))])
+    if "Write a concise, professional resume summary" in prompt:
+        return "Results-driven engineer with a track record of shipping reliable systems."
+    # Only the fields the prompt asks for, so output size tracks the prompt's schema
+    fields = {k: v for k, v in ANALYSIS_RESPONSE.items() if f'"{k}"' in prompt} or ANALYSIS_RESPONSE
+    return "```json\n" + json.dumps(fields) + "\n```"
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    ms_per_token = 0.0
+    stats = {"requests": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.lock:
+            self.stats["requests"] += 1
+
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        text = fake_reply(prompt)
+        output_tokens = len(text) // 4
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)) + output_tokens * self.ms_per_token / 1000)
+
+        if random.random() < self.error_rate:
+            with self.lock:
+                self.stats["errors"] += 1
+            self._send(503, json.dumps({"error": {"code": 503, "message": "The model is overloaded."}}),
+                       headers=[("Retry-After", "0.2")])
+            return
+
+        self._send(200, json.dumps({
+            "candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": output_tokens}
+        }))
+
+
+def start_fake_gemini(latency=0.0, jitter=0.0, error_rate=0.0, port=0, ms_per_token=0.0):
+    """Start the fake server on a background thread; returns (server, url)."""
+    handler = type("Handler", (FakeGeminiHandler,), {
+        "latency": latency, "jitter": jitter, "error_rate": error_rate, "ms_per_token": ms_per_token,
+        "stats": {"requests": 0, "errors": 0}
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/generate"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=1.0, help="mean seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="extra milliseconds per generated token")
+    args = parser.parse_args()
+
+    server, url = start_fake_gemini(args.latency, args.jitter, args.error_rate, args.port, args.ms_per_token)
+    print(f"Fake Gemini listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure app import time and RSS, lazily vs. eagerly loaded, in fresh interpreters.
+
+Usage: python benchmarks/measure_startup.py [--runs 3]
+
+"import app" is what a worker (or a request to /login) pays with lazy loading;
+"import app + warmup()" is the old eager cost, now paid once in the gunicorn master.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, os, resource, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+if {warm}:
+    app.warmup()
+elapsed = time.perf_counter() - start
+with open("/proc/self/statm") as f:
+    rss_mb = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+print(json.dumps({{"import_s": imported, "total_s": elapsed, "rss_mb": rss_mb,
+                  "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def probe(warm):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    out = subprocess.run([sys.executable, "-c", PROBE.format(warm=warm)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for label, warm in (("import app (lazy)", False), ("import app + warmup()", True)):
+        runs = [probe(warm) for _ in range(args.runs)]
+        print(f"{label:<24} {statistics.median(r['total_s'] for r in runs) * 1000:8.0f} ms   "
+              f"RSS {statistics.median(r['rss_mb'] for r in runs):6.1f} MB   "
+              f"peak {statistics.median(r['peak_mb'] for r in runs):6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(*parts):
+    """Build a stable SHA-256 key from string/bytes parts (length-prefixed so parts can't run together)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part or "").encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed cache with a bounded in-memory LRU tier and an optional SQLite tier.
+
+    Entries older than `ttl` seconds are treated as missing (ttl=None disables expiry).
+    The memory tier holds at most `max_entries` items and, when `sizeof` is given, at
+    most `max_bytes` as measured by sizeof(value); the SQLite tier holds at most
+    `disk_max_entries`. Both evict the least recently used entries first. Values handed
+    out from the memory tier are shared, so callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries=256, ttl=None, db_path=None, disk_max_entries=10000,
+                 max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._memory_bytes = 0
+        self.ttl = ttl
+        self.db_path = db_path
+        self.disk_max_entries = disk_max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "sets": 0, "memory_evictions": 0, "disk_evictions": 0, "expired": 0}
+
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed ON cache (accessed)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, key, default=None):
+        """Return the cached value for key, promoting disk hits into memory, or default."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if self._expired(created, now):
+                    self._drop(key)
+                    self._counters["expired"] += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["memory_hits"] += 1
+                    return value
+
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        if self._expired(row[1], now):
+                            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                            self._count("expired")
+                        else:
+                            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+                            value = pickle.loads(row[0])
+                            self._remember(key, value, row[1])
+                            self._count("hits")
+                            self._count("disk_hits")
+                            return value
+            except sqlite3.Error as e:
+                print(f"Cache read error: {e}")
+
+        self._count("misses")
+        return default
+
+    def _size(self, value):
+        return self.sizeof(value) if self.sizeof else 0
+
+    def _drop(self, key):
+        """Remove key from the memory tier; caller holds the lock."""
+        created, value = self._memory.pop(key)
+        self._memory_bytes -= self._size(value)
+
+    def _over_limit(self):
+        if len(self._memory) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._memory_bytes > self.max_bytes
+
+    def _remember(self, key, value, created):
+        with self._lock:
+            if key in self._memory:
+                self._drop(key)
+            self._memory[key] = (created, value)
+            self._memory_bytes += self._size(value)
+            while self._memory and self._over_limit():
+                self._drop(next(iter(self._memory)))
+                self._counters["memory_evictions"] += 1
+
+    def set(self, key, value):
+        """Store value under key in both tiers, evicting the oldest entries past the size limits."""
+        now = time.time()
+        self._remember(key, value, now)
+        self._count("sets")
+
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                        (key, pickle.dumps(value), now, now)
+                    )
+                    if self.ttl is not None:
+                        conn.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl,))
+                    deleted = conn.execute(
+                        "DELETE FROM cache WHERE key IN ("
+                        "SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_max_entries,)
+                    ).rowcount
+                    if deleted > 0:
+                        self._count("disk_evictions", deleted)
+            except sqlite3.Error as e:
+                print(f"Cache write error: {e}")
+
+    def clear(self):
+        """Drop every entry from both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache")
+
+    def stats(self):
+        """Return hit/miss counters, the hit rate and current tier sizes."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_size"] = len(self._memory)
+            if self.sizeof:
+                stats["memory_bytes"] = self._memory_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] / lookups) if lookups else 0.0
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    stats["disk_size"] = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            except sqlite3.Error:
+                stats["disk_size"] = None
+        return stats
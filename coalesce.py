@@ -0,0 +1,61 @@
+import threading
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class Coalescer:
+    """Collects items submitted concurrently within `window` seconds and handles them with one call.
+
+    `batch_fn(items)` must return one result per item, in order. The first caller to open a
+    batch waits up to `window` seconds (less if `max_batch` items arrive), runs `batch_fn`
+    on its own thread and hands every other caller its result. Exceptions raised by
+    `batch_fn` are re-raised in every caller of that batch.
+    """
+
+    def __init__(self, batch_fn, window=0.02, max_batch=20):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._open = None
+        self.stats = {"items": 0, "batches": 0}
+
+    def submit(self, item):
+        """Add item to the open batch (opening one if needed) and block until its result is ready."""
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+
+        if not leader:
+            batch.done.wait()
+        else:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+                self.stats["items"] += len(batch.items)
+                self.stats["batches"] += 1
+            try:
+                batch.results = self.batch_fn(list(batch.items))
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
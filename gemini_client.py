@@ -0,0 +1,165 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+
+class GeminiClient:
+    """Reusable Gemini generateContent client.
+
+    Keeps one pooled keep-alive `requests.Session`, caps in-flight HTTP calls with a
+    semaphore shared by the sync and async entry points, and retries transient
+    failures with exponential backoff plus full jitter, honouring `Retry-After`.
+    Like the old `call_gemini`, failures are returned as strings starting with "Error".
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key, url, timeout=120, connect_timeout=10, max_retries=3,
+                 backoff_base=1.0, backoff_max=30.0, max_concurrency=8):
+        self.api_key = api_key
+        self.url = url
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._limiter = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "prompt_tokens": 0, "output_tokens": 0}
+
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _payload(self, text, generation_config=None):
+        data = {"contents": [{"parts": [{"text": text}]}]}
+        if generation_config:
+            data["generationConfig"] = generation_config
+        return data
+
+    def _post(self, payload):
+        """Send one HTTP request, holding a concurrency slot only while it is in flight."""
+        with self._limiter:
+            self._count("requests")
+            return self.session.post(self.url, params={"key": self.api_key}, json=payload, timeout=self.timeout)
+
+    def _retry_delay(self, attempt, resp=None):
+        """Seconds to wait before the next attempt: Retry-After if given, else jittered exponential backoff."""
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(self.backoff_max, max(0.0, delay))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _result(self, resp):
+        """Turn a final HTTP response into the model text or an "Error ..." string."""
+        if resp.status_code != 200:
+            return f"Error {resp.status_code}: {resp.text}"
+
+        try:
+            res_json = resp.json()
+        except ValueError:
+            self._count("errors")
+            return f"Error: Invalid JSON from AI: {resp.text[:200]}"
+        if not isinstance(res_json, dict):
+            self._count("errors")
+            return "Error: Unexpected AI response format."
+        usage = res_json.get('usageMetadata') or {}
+        self._count("prompt_tokens", usage.get('promptTokenCount', 0))
+        self._count("output_tokens", usage.get('candidatesTokenCount', 0))
+        if 'candidates' not in res_json or not res_json['candidates']:
+            return "Error: No response candidates (Possible Safety Block)."
+
+        candidate = res_json['candidates'][0]
+        try:
+            return candidate['content']['parts'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            # e.g. a SAFETY or RECITATION finish with no content
+            reason = candidate.get('finishReason') if isinstance(candidate, dict) else None
+            return f"Error: Empty AI response (finishReason: {reason or 'unknown'})."
+
+    def _should_retry(self, attempt, resp=None):
+        last_attempt = attempt >= self.max_retries - 1
+        if resp is not None and resp.status_code not in self.RETRY_STATUSES:
+            return False
+        if not last_attempt:
+            self._count("retries")
+        return not last_attempt
+
+    def generate(self, text, generation_config=None):
+        """Blocking call: return the generated text for a prompt."""
+        with metrics.timed("llm_call"):
+            return self._generate(text, generation_config)
+
+    def _generate(self, text, generation_config=None):
+        if not self.api_key: return "Error: No API Key found in .env"
+        payload = self._payload(text, generation_config)
+
+        for attempt in range(self.max_retries):
+            try:
+                resp = self._post(payload)
+            except requests.RequestException as e:
+                if self._should_retry(attempt):
+                    time.sleep(self._retry_delay(attempt))
+                    continue
+                self._count("errors")
+                return f"Error connecting to AI: {str(e)}"
+
+            if resp.status_code != 200 and self._should_retry(attempt, resp):
+                time.sleep(self._retry_delay(attempt, resp))
+                continue
+            if resp.status_code != 200:
+                self._count("errors")
+            return self._result(resp)
+
+    async def agenerate(self, text, generation_config=None):
+        """Asyncio variant of generate(): the HTTP call runs in a thread and backoff never blocks the loop."""
+        start = time.perf_counter()
+        try:
+            return await self._agenerate(text, generation_config)
+        finally:
+            metrics.record("llm_call", time.perf_counter() - start)
+
+    async def _agenerate(self, text, generation_config=None):
+        if not self.api_key: return "Error: No API Key found in .env"
+        payload = self._payload(text, generation_config)
+
+        for attempt in range(self.max_retries):
+            try:
+                resp = await asyncio.to_thread(self._post, payload)
+            except requests.RequestException as e:
+                if self._should_retry(attempt):
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                self._count("errors")
+                return f"Error connecting to AI: {str(e)}"
+
+            if resp.status_code != 200 and self._should_retry(attempt, resp):
+                await asyncio.sleep(self._retry_delay(attempt, resp))
+                continue
+            if resp.status_code != 200:
+                self._count("errors")
+            return self._result(resp)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,17 @@
+# Gunicorn settings (used by render.yaml's startCommand).
+# The app is imported once in the master and warmed up there before any worker is
+# forked, so the spaCy model and heavy libraries are loaded once and shared
+# copy-on-write instead of being loaded again by every worker.
+preload_app = True
+
+timeout = 120
+# Threads let a worker keep serving while one request waits on Gemini
+worker_class = "gthread"
+threads = 4
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before workers fork
+    from app import warmup
+    warmup()
+    server.log.info("Warmup complete: NLP model and report libraries loaded in master")
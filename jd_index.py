@@ -0,0 +1,208 @@
+import threading
+
+from ats_engine import ATSScanner, SCORE_WEIGHTS
+
+
+class JDIndex:
+    """In-memory index of job descriptions for ranking many JDs against one resume.
+
+    Each JD is reduced once to the term set ATSScanner would compare it on (taxonomy skills,
+    or lemmas for JDs that name no skills), stored under "<source>:<term>" keys. An inverted
+    index maps terms to JD slots; per-term posting arrays and smoothed IDF weights are
+    rebuilt lazily after adds/removes, so a query is a few NumPy bincounts over the
+    postings of the resume's terms. Ranking follows the calculate_score keyword component
+    (every other component depends only on the resume), ties broken by TF-IDF cosine.
+    JDs may be added with an owner; a query for an owner only ranks that owner's JDs.
+    """
+
+    def __init__(self, scanner=None):
+        self.scanner = scanner or ATSScanner()
+        self._lock = threading.Lock()
+        self._ids = []            # slot -> jd_id (None for a free slot)
+        self._slot_of = {}        # jd_id -> slot
+        self._doc_terms = []      # slot -> tuple of term ids (None for a free slot)
+        self._free = []
+        self._owner_slots = {}    # owner -> set of slots
+        self._owner_of = {}       # slot -> owner
+        self._vocab = {}          # "<source>:<term>" -> term id
+        self._terms = []          # term id -> "<source>:<term>"
+        self._postings = []       # term id -> set of slots
+        self._compiled = None
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, jd_id):
+        return jd_id in self._slot_of
+
+    def count(self, owner=None):
+        """Number of indexed JDs, or of those belonging to owner."""
+        if owner is None:
+            return len(self._slot_of)
+        return len(self._owner_slots.get(owner, ()))
+
+    def ids(self):
+        return list(self._slot_of)
+
+    def extract(self, text):
+        """The (source, sorted terms) a JD is indexed and compared on."""
+        analysis = self.scanner.analyze_jd(text)
+        source = self.scanner.keyword_source(analysis)
+        return source, sorted(set(analysis[source]))
+
+    def add(self, jd_id, text=None, source=None, terms=None, owner=None):
+        """Index a JD from its text, or from a previously extracted (source, terms) pair.
+
+        Re-adding an existing id replaces it. Raises ValueError for a JD with no terms,
+        which calculate_score would treat as "no JD" and give full keyword marks.
+        """
+        if terms is None:
+            source, terms = self.extract(text or "")
+        if not terms:
+            raise ValueError("No keywords found in job description.")
+
+        with self._lock:
+            if jd_id in self._slot_of:
+                self._remove(jd_id)
+            term_ids = []
+            for term in set(terms):
+                key = f"{source}:{term}"
+                term_id = self._vocab.get(key)
+                if term_id is None:
+                    term_id = self._vocab[key] = len(self._terms)
+                    self._terms.append(key)
+                    self._postings.append(set())
+                term_ids.append(term_id)
+
+            slot = self._free.pop() if self._free else len(self._ids)
+            if slot == len(self._ids):
+                self._ids.append(None)
+                self._doc_terms.append(None)
+            self._ids[slot] = jd_id
+            self._doc_terms[slot] = tuple(term_ids)
+            self._slot_of[jd_id] = slot
+            if owner is not None:
+                self._owner_of[slot] = owner
+                self._owner_slots.setdefault(owner, set()).add(slot)
+            for term_id in term_ids:
+                self._postings[term_id].add(slot)
+            self._compiled = None
+        return source, terms
+
+    def remove(self, jd_id):
+        """Drop a JD from the index; returns False if it wasn't indexed."""
+        with self._lock:
+            if jd_id not in self._slot_of:
+                return False
+            self._remove(jd_id)
+            self._compiled = None
+            return True
+
+    def _remove(self, jd_id):
+        slot = self._slot_of.pop(jd_id)
+        for term_id in self._doc_terms[slot]:
+            self._postings[term_id].discard(slot)
+        self._ids[slot] = None
+        self._doc_terms[slot] = None
+        owner = self._owner_of.pop(slot, None)
+        if owner is not None:
+            self._owner_slots[owner].discard(slot)
+            if not self._owner_slots[owner]:
+                del self._owner_slots[owner]
+        self._free.append(slot)
+
+    def _compile(self):
+        """Posting arrays, IDF weights and per-slot sizes/norms for the current contents."""
+        import numpy as np
+
+        n_slots = len(self._ids)
+        df = np.array([len(p) for p in self._postings], dtype=np.float64)
+        idf = np.log((1 + len(self._slot_of)) / (1 + df)) + 1
+        postings = [np.fromiter(p, dtype=np.int64, count=len(p)) for p in self._postings]
+
+        sizes = np.zeros(n_slots)
+        norms = np.ones(n_slots)
+        active = np.zeros(n_slots, dtype=bool)
+        for slot, term_ids in enumerate(self._doc_terms):
+            if term_ids is not None:
+                active[slot] = True
+                sizes[slot] = len(term_ids)
+                norms[slot] = np.sqrt(np.sum(idf[list(term_ids)] ** 2))
+        return {"idf": idf, "postings": postings, "sizes": sizes, "norms": norms, "active": active,
+                "ids": list(self._ids), "doc_terms": list(self._doc_terms)}
+
+    def _snapshot(self, owner=None):
+        with self._lock:
+            if self._compiled is None:
+                self._compiled = self._compile()
+            owner_slots = list(self._owner_slots.get(owner, ())) if owner is not None else None
+            return self._compiled, dict(self._vocab), list(self._terms), owner_slots
+
+    def query(self, resume_text, k=10, owner=None):
+        """Top-k JDs for a resume, best first; only the owner's JDs when owner is given.
+
+        Each hit is {"jd_id", "similarity", "keywords": {"matched", "missing", "match_rate",
+        "jd_provided", "source"}, "score"}, where "score" is exactly what
+        ATSScanner.calculate_score returns for that resume/JD pair.
+        """
+        import numpy as np
+
+        index, vocab, terms, owner_slots = self._snapshot(owner)
+        active = index["active"]
+        if owner_slots is not None:
+            active = np.zeros_like(active)
+            active[owner_slots] = True
+        if not active.any():
+            return []
+
+        scanner = self.scanner
+        analysis = scanner.analyze_cached(resume_text)
+        info = scanner.parse_resume_info(resume_text, analysis)
+        sections = scanner.detect_sections(resume_text)
+        resume_keys = {f"skills:{s}" for s in analysis["skills"]} | {f"keywords:{w}" for w in analysis["keywords"]}
+        query_ids = np.array(sorted(vocab[key] for key in resume_keys if key in vocab), dtype=np.int64)
+
+        n_slots = len(index["ids"])
+        if len(query_ids):
+            postings = [index["postings"][t] for t in query_ids]
+            slots = np.concatenate(postings)
+            weights = np.repeat(index["idf"][query_ids] ** 2, [len(p) for p in postings])
+            matched = np.bincount(slots, minlength=n_slots)
+            dots = np.bincount(slots, weights=weights, minlength=n_slots)
+            query_norm = np.sqrt(np.sum(index["idf"][query_ids] ** 2))
+        else:
+            matched = np.zeros(n_slots)
+            dots = np.zeros(n_slots)
+            query_norm = 1.0
+
+        sizes = np.where(active, index["sizes"], 1)
+        match_rate = matched / sizes
+        # Same rounding as calculate_score: round-half-even, capped at the keyword weight
+        keyword_weight = SCORE_WEIGHTS["keyword"]
+        keyword_score = np.minimum(keyword_weight, np.round(match_rate * keyword_weight))
+        similarity = dots / (index["norms"] * query_norm)
+        rank_key = np.where(active, keyword_score + 0.999 * similarity, -1.0)
+
+        k = min(k, int(active.sum()))
+        top = np.argpartition(-rank_key, k - 1)[:k]
+        top = top[np.lexsort((-similarity[top], -keyword_score[top]))]
+
+        query_set = set(query_ids.tolist())
+        hits = []
+        for slot in top:
+            jd_terms = index["doc_terms"][slot]
+            source = terms[jd_terms[0]].split(":", 1)[0]
+            keywords = {
+                "matched": sorted(terms[t].split(":", 1)[1] for t in jd_terms if t in query_set),
+                "missing": sorted(terms[t].split(":", 1)[1] for t in jd_terms if t not in query_set),
+                "match_rate": float(match_rate[slot]),
+                "jd_provided": True,
+                "source": source
+            }
+            hits.append({
+                "jd_id": index["ids"][slot],
+                "similarity": round(float(similarity[slot]), 4),
+                "keywords": keywords,
+                "score": scanner.calculate_score(keywords, sections, info)
+            })
+        return hits
@@ -0,0 +1,135 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Job lifecycle states; "done" and "failed" are terminal
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+TERMINAL_STATES = {DONE, FAILED}
+
+
+class JobQueue:
+    """In-process background job runner with job state kept in SQLite.
+
+    Work runs on a thread pool inside the web worker, so no external broker is
+    needed. Because state lives in a SQLite file, a status poll that lands on a
+    different gunicorn worker still sees the job. A job that stays queued or
+    running with no update for `stale_after` seconds (its worker was restarted or
+    killed) is reported as failed.
+    """
+
+    def __init__(self, db_path, max_workers=4, ttl=3600, stale_after=900):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_schema(self):
+        if self._ready:
+            return
+        with self._init_lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "id TEXT PRIMARY KEY, kind TEXT NOT NULL, user_id INTEGER, status TEXT NOT NULL, "
+                    "result TEXT, error TEXT, created REAL NOT NULL, updated REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_updated ON jobs (updated)")
+            self._ready = True
+
+    def submit(self, kind, fn, *args, user_id=None, with_progress=False, **kwargs):
+        """Queue fn(*args, **kwargs) and return the new job id straight away.
+
+        With with_progress=True, fn also receives a `progress` callback; each call
+        stores a partial result that watchers see while the job is still running.
+        """
+        self._ensure_schema()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, status, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, user_id, QUEUED, now, now)
+            )
+            # Housekeeping: forget finished jobs nobody collected
+            conn.execute("DELETE FROM jobs WHERE updated < ?", (now - self.ttl,))
+        if with_progress:
+            kwargs["progress"] = lambda partial: self.update(job_id, result=partial)
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        self.update(job_id, status=RUNNING)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self.update(job_id, status=FAILED, error=str(e))
+        else:
+            self.update(job_id, status=DONE, result=result)
+
+    def update(self, job_id, status=None, result=None, error=None):
+        """Record a state change; result is stored as JSON."""
+        fields, values = ["updated = ?"], [time.time()]
+        if status is not None:
+            fields.append("status = ?")
+            values.append(status)
+        if result is not None:
+            fields.append("result = ?")
+            values.append(json.dumps(result))
+        if error is not None:
+            fields.append("error = ?")
+            values.append(error)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?", (*values, job_id))
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it does not exist (or has expired)."""
+        self._ensure_schema()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row["status"] not in TERMINAL_STATES and row["updated"] < time.time() - self.stale_after:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ? AND status IN (?, ?) AND updated = ?",
+                    (FAILED, "Job timed out; its worker may have restarted.", time.time(), job_id, QUEUED, RUNNING,
+                     row["updated"])
+                )
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "user_id": row["user_id"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "updated": row["updated"]
+        }
+
+    def watch(self, job_id, poll_interval=0.5, timeout=300):
+        """Yield the job each time it changes, stopping once it is terminal or timeout passes."""
+        deadline = time.time() + timeout
+        last_seen = None
+        while time.time() < deadline:
+            job = self.get(job_id)
+            if job is None:
+                return
+            if job["updated"] != last_seen:
+                last_seen = job["updated"]
+                yield job
+            if job["status"] in TERMINAL_STATES:
+                return
+            time.sleep(poll_interval)
@@ -0,0 +1,127 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Latency buckets in seconds: sub-millisecond local stages up to the 120s LLM timeout
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with one label, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_value):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                base = [(self.label, label_value)]
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(base + [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(base + [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(base)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(base)} {series['count']}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("smartjob_stage_seconds", "Time spent in each analysis pipeline stage.", "stage")
+REQUEST_SECONDS = Histogram("smartjob_request_seconds", "End-to-end request handling time by endpoint.", "endpoint")
+PROMPT_TOKENS = Histogram("smartjob_prompt_tokens", "Estimated input tokens sent to Gemini by prompt type.", "prompt",
+                          buckets=(100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000, 16000))
+
+# Callables returning [(name, type, help, [(labels, value), ...]), ...] for values owned
+# elsewhere (cache counters, LLM retry counts), sampled at scrape time
+_collectors = []
+
+# Per-request (stage, seconds) list, used for the Server-Timing header
+_request_timings = ContextVar("request_timings", default=None)
+
+
+def register_collector(fn):
+    _collectors.append(fn)
+    return fn
+
+
+def start_request_timing():
+    _request_timings.set([])
+
+
+def request_timings():
+    """Return {stage: total seconds} recorded so far in the current request."""
+    totals = {}
+    for stage, seconds in _request_timings.get() or []:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return totals
+
+
+def record(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage):
+    """Time the enclosed block as one observation of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed_fn(stage):
+    """Decorator form of timed()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render():
+    """Prometheus text exposition of this process's metrics.
+
+    Each gunicorn worker keeps its own numbers; a scrape sees the worker that served it.
+    """
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render() + PROMPT_TOKENS.render()
+    for collector in _collectors:
+        try:
+            families = collector()
+        except Exception as e:
+            print(f"Metrics collector failed: {e}")
+            continue
+        for name, metric_type, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
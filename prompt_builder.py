@@ -0,0 +1,134 @@
+import re
+
+from ats_engine import ATSScanner
+
+# Rough size of a Gemini token for English prose; good enough for budgeting, not billing
+CHARS_PER_TOKEN = 4
+
+# Resume sections in the order they earn prompt space; text before the first header
+# (name, headline, summary) and unlisted sections such as contact info come last
+RESUME_SECTION_PRIORITY = ["Skills", "Experience", "Projects", "Certifications", "Education"]
+PREAMBLE = "Preamble"
+
+# JD lines that state what the candidate needs, packed before the company/benefits blurb
+REQUIREMENT_PATTERN = re.compile(
+    r"^\s*(?:[-*•▪●]|\d+[.)])"
+    r"|\b(?:requir\w*|must|should|experience (?:with|in)|proficien\w*|knowledge of|familiar\w*"
+    r"|qualifications?|skills?|years?|degree|responsibilit\w*|ability to)\b",
+    re.IGNORECASE
+)
+
+# JD lines longer than this are split into sentences before packing
+LONG_LINE_CHARS = 300
+SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+")
+
+_scanner = ATSScanner()
+
+
+def estimate_tokens(text):
+    """Approximate token count of text (ceil of chars / CHARS_PER_TOKEN)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def clean_text(text):
+    """Collapse runs of whitespace, drop blank lines and immediate repeats of the previous line.
+
+    Only consecutive repeats go: a line seen earlier in the document may be real content
+    (the same job title at two employers).
+    """
+    lines = []
+    previous = None
+    for line in (text or "").splitlines():
+        line = " ".join(line.split())
+        key = line.lower()
+        if not line or key == previous:
+            continue
+        previous = key
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _fit_lines(text, max_chars):
+    """The longest prefix of text that fits in max_chars, cut at a line or word boundary."""
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars + 1]
+    cut = max(head.rfind("\n"), head.rfind(" "))
+    return text[:cut].rstrip() if cut > 0 else text[:max_chars]
+
+
+def _pack(blocks, budget_tokens, min_tokens=25):
+    """Fill the budget with blocks in priority order, then emit the chosen text in document order.
+
+    blocks is [(priority, position, text)]. Blocks that fit are taken whole; once one doesn't,
+    only short blocks (under min_tokens, e.g. a name line) are still taken whole. The budget
+    left is then filled with the blocks that didn't fit, in priority order, each cut at a
+    word boundary.
+    """
+    remaining = budget_tokens * CHARS_PER_TOKEN
+    short = min_tokens * CHARS_PER_TOKEN
+    chosen = []
+    skipped = []
+    for _, position, text in sorted(blocks):
+        if not text:
+            continue
+        if len(text) + 1 <= remaining and (not skipped or len(text) < short):
+            chosen.append((position, text))
+            remaining -= len(text) + 1
+        else:
+            skipped.append((position, text))
+    for position, text in skipped:
+        if remaining < short:
+            break
+        text = _fit_lines(text, remaining - 1)
+        chosen.append((position, text))
+        remaining -= len(text) + 1
+    return "\n".join(text for _, text in sorted(chosen) if text)
+
+
+def pack_resume(text, budget_tokens):
+    """Resume text for a prompt: cleaned, and if over budget, the highest-value sections first."""
+    text = clean_text(text)
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+
+    located = _scanner.locate_sections(text)
+    if not located:
+        return _fit_lines(text, budget_tokens * CHARS_PER_TOKEN)
+
+    order = RESUME_SECTION_PRIORITY + [PREAMBLE]
+    first = min(loc["span"][0] for loc in located.values())
+    blocks = [(order.index(PREAMBLE), 0, text[:first].strip())]
+    for section, loc in located.items():
+        start, end = loc["span"]
+        priority = order.index(section) if section in order else len(order)
+        blocks.append((priority, start, text[start:end].strip()))
+    return _pack(blocks, budget_tokens)
+
+
+def pack_jd(jd_text, budget_tokens):
+    """JD text for a prompt: cleaned, and if over budget, requirement lines before everything else."""
+    jd_text = clean_text(jd_text)
+    if estimate_tokens(jd_text) <= budget_tokens:
+        return jd_text
+
+    # Long lines (JDs written as one paragraph) are ranked sentence by sentence
+    units = []
+    for line in jd_text.split("\n"):
+        units.extend(SENTENCE_BREAK.split(line) if len(line) > LONG_LINE_CHARS else [line])
+    blocks = [(0 if REQUIREMENT_PATTERN.search(unit) else 1, i, unit) for i, unit in enumerate(units)]
+    # Unit by unit: skip what doesn't fit rather than stopping at the first miss,
+    # then cut the first skipped unit to fill what is left
+    remaining = budget_tokens * CHARS_PER_TOKEN
+    chosen = []
+    skipped = []
+    for _, position, unit in sorted(blocks):
+        if len(unit) + 1 <= remaining:
+            chosen.append((position, unit))
+            remaining -= len(unit) + 1
+        else:
+            skipped.append((position, unit))
+    if skipped and remaining > 1:
+        position, unit = skipped[0]
+        chosen.append((position, _fit_lines(unit, remaining - 1)))
+    return "\n".join(unit for _, unit in sorted(chosen) if unit)
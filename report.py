@@ -0,0 +1,199 @@
+import json
+import os
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import metrics
+from ats_engine import SCORE_WEIGHTS
+from cache import ResultCache, make_key
+
+# Bump when the layout changes so cached PDFs from the old layout aren't served
+REPORT_VERSION = "2"
+
+# Flask's default instance folder for this app; private to the app's user
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance")
+
+
+def _private_db_path(filename):
+    """Path for a cache file in INSTANCE_DIR, created 0700; None if the folder isn't private.
+
+    ResultCache unpickles what it reads back, so the file must not sit anywhere another
+    local user could create or write it first (such as the shared temp directory).
+    """
+    try:
+        os.makedirs(INSTANCE_DIR, mode=0o700, exist_ok=True)
+        st = os.stat(INSTANCE_DIR)
+    except OSError as e:
+        print(f"Report cache disk tier disabled: {e}")
+        return None
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        print(f"Report cache disk tier disabled: {INSTANCE_DIR} is not private to this user")
+        return None
+    return os.path.join(INSTANCE_DIR, filename)
+
+
+# Rendered PDFs keyed by a hash of the report payload. The on-disk tier is on by default
+# so a report rendered by a background job can be downloaded from any gunicorn worker.
+REPORT_CACHE = ResultCache(
+    max_entries=int(os.getenv("REPORT_CACHE_SIZE", "64")),
+    max_bytes=int(os.getenv("REPORT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    sizeof=len,
+    ttl=int(os.getenv("REPORT_CACHE_TTL", str(24 * 3600))),
+    db_path=os.getenv("REPORT_CACHE_DB", _private_db_path("smartjob_reports.db")) or None,
+    disk_max_entries=int(os.getenv("REPORT_CACHE_DISK_SIZE", "500"))
+)
+
+# Score components and their maximums, in the order calculate_score reports them
+SCORE_PARTS = [
+    ("keyword_score", "Keyword match", SCORE_WEIGHTS["keyword"]),
+    ("section_score", "Resume sections", SCORE_WEIGHTS["section"]),
+    ("contact_score", "Contact details", SCORE_WEIGHTS["contact"]),
+    ("format_score", "Formatting", SCORE_WEIGHTS["format"]),
+]
+
+
+def report_key(data):
+    """Cache key for a report payload (a single analysis or {"results": [...]})."""
+    return make_key("report", REPORT_VERSION, json.dumps(data, sort_keys=True, default=str))
+
+
+def get_report_pdf(data):
+    """Return the PDF bytes for a payload, rendering and caching them on a miss."""
+    key = report_key(data)
+    pdf = REPORT_CACHE.get(key)
+    if pdf is None:
+        pdf = render_report(data)
+        REPORT_CACHE.set(key, pdf)
+    return pdf
+
+
+def _styles():
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    base = getSampleStyleSheet()
+    return {
+        "title": base["Title"],
+        "h2": base["Heading2"],
+        "h3": base["Heading3"],
+        "body": base["BodyText"],
+        "muted": ParagraphStyle("muted", parent=base["BodyText"], textColor="#6b7280"),
+        "bullet": ParagraphStyle("bullet", parent=base["BodyText"], leftIndent=14, bulletIndent=4),
+    }
+
+
+def _text(value):
+    return escape(str(value)) if value not in (None, "") else "—"
+
+
+def _bullets(items, styles):
+    from reportlab.platypus import Paragraph
+
+    if not items:
+        return [Paragraph("None", styles["muted"])]
+    return [Paragraph(item, styles["bullet"], bulletText="•") for item in items]
+
+
+def _table(rows, col_widths, header=True):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    table = Table(rows, colWidths=col_widths, hAlign="LEFT")
+    style = [
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#d1d5db")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+    ]
+    if header:
+        style += [("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#ede9fe")),
+                  ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")]
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def _analysis_story(data, styles, title):
+    """Flowables for one analysis: info, score breakdown, sections, keywords and AI suggestions."""
+    from reportlab.platypus import Paragraph, Spacer
+
+    story = [Paragraph(escape(title), styles["title"])]
+
+    info = data.get("info") or {}
+    story.append(Paragraph(
+        f"<b>{_text(info.get('name') or 'Candidate')}</b> &nbsp; {_text(info.get('email'))} &nbsp; {_text(info.get('phone'))}",
+        styles["body"]))
+    story.append(Spacer(1, 10))
+
+    score = data.get("score") or {}
+    breakdown = score.get("breakdown") or {}
+    story.append(Paragraph(f"Overall ATS Score: {_text(score.get('total_score', 'N/A'))}/100", styles["h2"]))
+    rows = [["Component", "Score", "Out of"]]
+    rows += [[label, str(breakdown.get(key, "—")), str(maximum)] for key, label, maximum in SCORE_PARTS]
+    story.append(_table(rows, [200, 80, 80]))
+
+    sections = data.get("sections") or {}
+    if sections:
+        story.append(Paragraph("Resume Sections", styles["h2"]))
+        story.append(_table([["Section", "Status"]] + [[name, status] for name, status in sections.items()], [200, 160]))
+
+    keywords = data.get("keywords") or {}
+    story.append(Paragraph("Keyword Analysis", styles["h2"]))
+    if keywords.get("source"):
+        story.append(Paragraph(f"Compared by: {_text(keywords['source'])}", styles["muted"]))
+    for key, label in (("matched", "Matched"), ("missing", "Missing from resume"), ("extra", "Additional in resume")):
+        words = keywords.get(key) or []
+        story.append(Paragraph(f"{label} ({len(words)})", styles["h3"]))
+        story.append(Paragraph(escape(", ".join(map(str, words))) or "None", styles["body"]))
+
+    ai = data.get("ai_analysis") or {}
+    if ai and not ai.get("error"):
+        story.append(Paragraph("AI Suggestions", styles["h2"]))
+        story += _bullets([escape(str(tip)) for tip in ai.get("ats_tips") or []], styles)
+
+        missing_skills = ai.get("missing_skills") or []
+        if missing_skills:
+            story.append(Paragraph("Skills to Develop", styles["h3"]))
+            story += _bullets([f"<b>{_text(m.get('skill'))}</b>: {_text(m.get('recommendation'))}"
+                               for m in missing_skills if isinstance(m, dict)], styles)
+
+        roles = ai.get("job_roles") or []
+        if roles:
+            story.append(Paragraph("Suggested Roles", styles["h3"]))
+            story += _bullets([f"<b>{_text(r.get('title'))}</b>: {_text(r.get('description'))}"
+                               for r in roles if isinstance(r, dict)], styles)
+    return story
+
+
+def _page_footer(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColorRGB(0.42, 0.45, 0.5)
+    canvas.drawString(doc.leftMargin, 20, "Smart Job Assistant - ATS Resume Analysis Report")
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 20, f"Page {doc.page}")
+    canvas.restoreState()
+
+
+def render_report(data):
+    """Render an analysis, or a bulk {"results": [...]} payload, to PDF bytes.
+
+    Long keyword lists and tips wrap and flow onto further pages; each bulk result
+    starts on a new page.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+    with metrics.timed("report_render"):
+        styles = _styles()
+        if isinstance(data.get("results"), list):
+            story = []
+            for i, result in enumerate(data["results"]):
+                if i:
+                    story.append(PageBreak())
+                title = f"#{result.get('rank', i + 1)} {result.get('filename') or 'Resume'}"
+                story += _analysis_story(result, styles, title)
+        else:
+            story = _analysis_story(data, styles, "ATS Resume Analysis Report")
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter, title="ATS Resume Analysis Report",
+                                leftMargin=50, rightMargin=50, topMargin=50, bottomMargin=50)
+        doc.build(story, onFirstPage=_page_footer, onLaterPages=_page_footer)
+        return buffer.getvalue()
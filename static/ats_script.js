@@ -90,26 +90,58 @@ document.addEventListener('DOMContentLoaded', async () => {
         formData.append('resume', fileInput.files[0]);
         formData.append('job_description', jdInput.value.trim());
 
+        // A failed run must not leave the previous analysis behind for "Download report"
+        currentReportData = null;
         loadingDiv.classList.remove('hidden');
         analyzeBtn.disabled = true;
         uploadForm.style.opacity = '0.5';
 
         try {
-            const response = await fetch('/analyze_ats', {
+            // Queue the analysis; the server answers immediately with a job id
+            const response = await fetch('/analyze_ats?async=1', {
                 method: 'POST',
                 body: formData
             });
 
-            const data = await response.json();
+            const job = await response.json();
 
-            if (!response.ok || data.error) {
-                alert(data.error || 'Failed to analyze resume.');
+            if (!response.ok || job.error) {
+                alert(job.error || 'Failed to analyze resume.');
+                return;
+            }
+
+            // The ATS score arrives first (partial result); the AI block follows when Gemini returns
+            let shownPartial = false;
+            const result = await waitForJob(job, (update) => {
+                if (update.status === 'running' && update.result && !shownPartial) {
+                    shownPartial = true;
+                    // The report can be downloaded from the ATS block alone if the AI step fails
+                    currentReportData = update.result;
+                    renderAts(update.result);
+                    renderAiPending();
+                    switchView('dashboard');
+                    loadingDiv.classList.add('hidden');
+                }
+            });
+            const data = result.result;
+
+            if (result.status !== 'done' || !data || data.error) {
+                if (shownPartial) {
+                    const aiError = { error: result.error || 'AI analysis failed.' };
+                    currentReportData = { ...currentReportData, ai_analysis: aiError };
+                    renderAi(aiError);
+                } else {
+                    alert(result.error || (data && data.error) || 'Failed to analyze resume.');
+                }
                 return;
             }
 
             currentReportData = data;
-            renderDashboard(data);
-            switchView('dashboard');
+            if (!shownPartial) {
+                renderAts(data);
+                switchView('dashboard');
+            }
+            renderAi(data.ai_analysis);
         } catch (err) {
             console.error(err);
             alert('An error occurred during analysis.');
@@ -120,9 +152,50 @@ document.addEventListener('DOMContentLoaded', async () => {
         }
     });
 
+    // Wait for a background job: stream status via Server-Sent Events, fall back to polling.
+    // onUpdate sees every intermediate status so partial results can be rendered early.
+    function waitForJob(job, onUpdate = () => { }) {
+        if (!window.EventSource) return pollJob(job.status_url, onUpdate);
+
+        return new Promise((resolve) => {
+            const source = new EventSource(job.events_url);
+            let finished = false;
+
+            source.addEventListener('status', (e) => {
+                const update = JSON.parse(e.data);
+                onUpdate(update);
+                if (update.status === 'done' || update.status === 'failed') {
+                    finished = true;
+                    source.close();
+                    resolve(update);
+                }
+            });
+
+            source.onerror = () => {
+                source.close();
+                if (!finished) resolve(pollJob(job.status_url, onUpdate));
+            };
+        });
+    }
+
+    // Gives up after maxWaitMs so a job the server lost can't keep the dashboard polling forever.
+    async function pollJob(statusUrl, onUpdate = () => { }, intervalMs = 1500, maxWaitMs = 10 * 60 * 1000) {
+        const deadline = Date.now() + maxWaitMs;
+        while (Date.now() < deadline) {
+            const res = await fetch(statusUrl);
+            const update = await res.json();
+            if (!res.ok) return { status: 'failed', error: update.error };
+            onUpdate(update);
+            if (update.status === 'done' || update.status === 'failed') return update;
+            await new Promise(r => setTimeout(r, intervalMs));
+        }
+        return { status: 'failed', error: 'The analysis is taking too long. Please try again.' };
+    }
+
     // 4. Rendering Dashboard
-    function renderDashboard(data) {
-        console.log("Rendering payload:", data);
+    // Deterministic ATS block: info, score, sections and keywords
+    function renderAts(data) {
+        console.log("Rendering ATS payload:", data);
 
         // -- Info --
         const infoMsg = document.getElementById('candidate-info');
@@ -176,11 +249,25 @@ document.addEventListener('DOMContentLoaded', async () => {
         kwRender('matched-kws', data.keywords.matched);
         kwRender('missing-kws', data.keywords.missing);
         kwRender('extra-kws', data.keywords.extra);
+    }
 
-        // -- AI Suggestions --
-        const ai = data.ai_analysis || {};
+    function renderAiPending() {
+        const tipsList = document.getElementById('ats-tips-list');
+        tipsList.innerHTML = '<li style="color:var(--text-secondary);">Generating AI suggestions...</li>';
+    }
+
+    // -- AI Suggestions --
+    function renderAi(aiAnalysis) {
+        const ai = aiAnalysis || {};
         const tipsList = document.getElementById('ats-tips-list');
         tipsList.innerHTML = '';
+        if (ai.error) {
+            const li = document.createElement('li');
+            li.style.color = "var(--text-secondary)";
+            li.textContent = 'AI suggestions are unavailable right now.';
+            tipsList.appendChild(li);
+            return;
+        }
         (ai.ats_tips || []).forEach(tip => {
             const li = document.createElement('li');
             li.style.marginBottom = '10px';
@@ -224,23 +311,27 @@ document.addEventListener('DOMContentLoaded', async () => {
 
     if (improveBtn) {
         improveBtn.addEventListener('click', async () => {
-            const sentence = sentenceInput.value.trim();
-            if (!sentence) return;
+            // One bullet per line; several lines are rewritten together in a single request
+            const sentences = sentenceInput.value.split('\n').map(s => s.trim()).filter(Boolean);
+            if (!sentences.length) return;
 
             improveBtn.disabled = true;
             improveBtn.textContent = 'Rewriting...';
             improvedResult.classList.add('hidden');
 
             try {
-                const res = await fetch('/improve_sentence', {
+                const batch = sentences.length > 1;
+                const res = await fetch(batch ? '/improve_sentences' : '/improve_sentence', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ sentence: sentence })
+                    body: JSON.stringify(batch ? { sentences: sentences } : { sentence: sentences[0] })
                 });
                 const data = await res.json();
+                const improved = batch && data.results ? data.results.map(r => r.improved).join('\n') : data.improved;
 
-                if (data.improved) {
-                    improvedText.textContent = data.improved;
+                if (improved) {
+                    improvedText.textContent = improved;
+                    improvedText.style.whiteSpace = 'pre-line';
                     improvedResult.classList.remove('hidden');
                 } else {
                     alert("Failed to improve sentence.");
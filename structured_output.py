@@ -0,0 +1,148 @@
+import json
+import threading
+
+# Gemini responseSchema type names -> the Python types json.loads produces for them
+_TYPES = {
+    "OBJECT": dict,
+    "ARRAY": list,
+    "STRING": str,
+    "INTEGER": int,
+    "NUMBER": (int, float),
+    "BOOLEAN": bool,
+}
+
+_DEFAULTS = {"OBJECT": dict, "ARRAY": list, "STRING": str, "INTEGER": int, "NUMBER": float, "BOOLEAN": bool}
+
+_stats_lock = threading.Lock()
+stats = {"parsed": 0, "repaired": 0, "incomplete": 0, "failed": 0}
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+def extract_json(text, expected_type=None):
+    """Return the first balanced JSON object or array in text, or None.
+
+    Tolerates code fences and prose around the JSON; braces inside strings (and escaped
+    quotes) are skipped, and a candidate that doesn't parse moves the search forward.
+    expected_type ("OBJECT" or "ARRAY") skips whole values of the other kind, so a bracketed
+    citation like "[1]" before the object isn't taken for the answer (nor is an array nested
+    inside an object taken for an expected array).
+    """
+    text = text or ""
+    expected = _TYPES.get(expected_type)
+    start = _next_open(text, 0)
+    while start != -1:
+        end = _balanced_end(text, start)
+        value = None
+        if end != -1:
+            try:
+                value = json.loads(text[start:end])
+            except ValueError:
+                end = -1
+        if end != -1 and (expected is None or isinstance(value, expected)):
+            return value
+        start = _next_open(text, end if end != -1 else start + 1)
+    return None
+
+
+def _next_open(text, pos):
+    positions = [p for p in (text.find("{", pos), text.find("[", pos)) if p != -1]
+    return min(positions) if positions else -1
+
+
+def _balanced_end(text, start):
+    """Index just past the bracket closing text[start], or -1 if it never closes."""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def matches(value, schema):
+    """Whether value fits a Gemini-style schema (type, required properties, array items), recursively."""
+    expected = _TYPES.get(schema.get("type"))
+    if expected is None:
+        return True
+    if not isinstance(value, expected) or (expected is not bool and isinstance(value, bool)):
+        return False
+    if expected is dict:
+        properties = schema.get("properties", {})
+        return all(name in value and matches(value[name], properties[name]) for name in schema.get("required", properties))
+    if expected is list and "items" in schema:
+        return all(matches(item, schema["items"]) for item in value)
+    return True
+
+
+def invalid_fields(obj, schema):
+    """Top-level properties of an OBJECT schema that are missing from obj or have the wrong shape."""
+    properties = schema.get("properties", {})
+    return [name for name in schema.get("required", properties)
+            if name not in obj or not matches(obj[name], properties[name])]
+
+
+def _subschema(schema, fields):
+    return {
+        "type": "OBJECT",
+        "properties": {name: schema["properties"][name] for name in fields},
+        "required": list(fields),
+    }
+
+
+def generate_json(client, prompt, schema, json_mode=True, repair=True):
+    """Call the model for JSON matching schema; returns (value, missing_fields, raw_text).
+
+    json_mode asks Gemini for application/json constrained by the schema. For OBJECT
+    schemas, fields still missing or malformed are re-requested once with a prompt that asks
+    for just those fields, and anything left over is filled with an empty default and
+    listed in missing_fields. value is None when no JSON could be extracted at all.
+    """
+    config = {"responseMimeType": "application/json", "responseSchema": schema} if json_mode else None
+    raw = client.generate(prompt, generation_config=config)
+    value = None if raw.startswith("Error") else extract_json(raw, schema["type"])
+    if value is None or not matches(value, {"type": schema["type"]}):
+        _count("failed")
+        return None, [], raw
+    if schema["type"] != "OBJECT":
+        _count("parsed" if matches(value, schema) else "incomplete")
+        return value, [], raw
+
+    missing = invalid_fields(value, schema)
+    if missing and repair:
+        sub = _subschema(schema, missing)
+        repair_prompt = (f"{prompt}\n\nYour previous answer was missing or had invalid values for: {', '.join(missing)}.\n"
+                         f"Return ONLY a JSON object with exactly these fields, matching this schema: {json.dumps(sub)}")
+        patch = extract_json(client.generate(repair_prompt, generation_config=dict(config, responseSchema=sub) if config else None),
+                             "OBJECT")
+        if isinstance(patch, dict):
+            for name in missing:
+                if name in patch and matches(patch[name], schema["properties"][name]):
+                    value[name] = patch[name]
+        if not invalid_fields(value, schema):
+            _count("repaired")
+            return value, [], raw
+        missing = invalid_fields(value, schema)
+
+    for name in missing:
+        value[name] = _DEFAULTS[schema["properties"][name]["type"]]()
+    _count("incomplete" if missing else "parsed")
+    return value, missing, raw